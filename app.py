@@ -4,9 +4,11 @@ from flask_migrate import Migrate
 from flask_cors import CORS
 from models import db
 from flask_swagger_ui import get_swaggerui_blueprint
+from json_provider import FastJSONProvider
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
 
     # Configuración de Swagger
     SWAGGER_URL = '/swagger'
@@ -16,10 +18,73 @@ def create_app():
     app.config['DEBUG'] = True
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///wemeet.db'
 
+    # Configuración del envío de invitaciones por correo
+    app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'localhost')
+    app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 1025))
+    app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', '0') == '1'
+    app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
+    app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
+    app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER', 'no-reply@wemeet.local')
+    app.config['MAIL_DISPATCHER_ENABLED'] = os.environ.get('MAIL_DISPATCHER_ENABLED', '1') == '1'
+    app.config['MAIL_WORKERS'] = 2
+    app.config['MAIL_BATCH_SIZE'] = 20
+    app.config['MAIL_POLL_INTERVAL'] = 2.0
+    app.config['MAIL_MAX_ATTEMPTS'] = 5
+    app.config['MAIL_RETRY_BACKOFF'] = 30
+
+    # Configuración del perfilado por petición (deshabilitado por defecto)
+    app.config['PROFILING_ENABLED'] = os.environ.get('PROFILING_ENABLED', '0') == '1'
+    app.config['PROFILING_ADMIN_TOKEN'] = os.environ.get('PROFILING_ADMIN_TOKEN')
+    app.config['PROFILING_SAMPLE_RATE'] = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+    app.config['PROFILING_DIR'] = os.environ.get('PROFILING_DIR', os.path.join(app.instance_path, 'profiles'))
+    app.config['PROFILING_MAX_FILES'] = 200
+
+    # Configuración de las respuestas idempotentes (header Idempotency-Key)
+    app.config['IDEMPOTENCY_TTL'] = 24 * 60 * 60
+    app.config['IDEMPOTENCY_CACHE_SIZE'] = 1024
+    app.config['IDEMPOTENCY_MAX_RECORDS'] = 10000
+    app.config['IDEMPOTENCY_PURGE_EVERY'] = 100
+    # Segundos que una clave queda reservada mientras su primera petición se ejecuta
+    app.config['IDEMPOTENCY_PENDING_TIMEOUT'] = 60
+
+    # Cantidad de reuniones cuyo heatmap se mantiene en memoria
+    app.config['HEATMAP_CACHE_SIZE'] = 256
+
+    # Log de cambios por reunión para la sincronización incremental
+    app.config['CHANGELOG_RETENTION'] = 500
+    app.config['CHANGELOG_COMPACT_EVERY'] = 50
+    app.config['CHANGELOG_MAX_DELTA'] = 300
+
+    # Control de admisión: límites (tokens por segundo, ráfaga) por endpoint o blueprint,
+    # aplicados por reunión, hash de invitación y dirección del cliente
+    app.config['RATELIMIT_ENABLED'] = os.environ.get('RATELIMIT_ENABLED', '1') == '1'
+    app.config['RATELIMIT_STORAGE_URI'] = os.environ.get('RATELIMIT_STORAGE_URI', 'memory://')
+    app.config['RATELIMIT_LIMITS'] = {
+        'timeslots.update_timeslot': {'client': (5, 20), 'meeting': (20, 60), 'invite': (5, 20)},
+        'timeslots.create_timeslot': {'client': (5, 20), 'meeting': (20, 60)},
+        'meetings.get_all_meetings': {'client': (1, 5)},
+        'meetings.create_meeting': {'client': (0.2, 5)},
+        'meetings.add_guest_to_meeting': {'client': (1, 10), 'meeting': (2, 20)},
+        'meetings': {'client': (10, 50)},
+    }
+    # Máximo de peticiones de escritura simultáneas por proceso y cuánto esperan por un turno
+    app.config['WRITE_CONCURRENCY_LIMIT'] = 4
+    app.config['WRITE_QUEUE_TIMEOUT'] = 10
+
+    # Permite sobrescribir la configuración (por ejemplo, en pruebas)
+    if config:
+        app.config.update(config)
+
     db.init_app(app)
     CORS(app)
     migrate = Migrate(app, db)
 
+    from idempotency import init_idempotency
+    init_idempotency(app)
+
+    from ratelimit import init_rate_limiting
+    init_rate_limiting(app)
+
     # Register Swagger blueprint
     app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
 
@@ -36,12 +101,28 @@ def create_app():
     app.register_blueprint(timeslots_bp)
     app.register_blueprint(final_dates_bp)
 
+    # Comandos de mantenimiento (flask maintenance ...)
+    from commands import maintenance_cli, mail_cli
+    app.cli.add_command(maintenance_cli)
+    app.cli.add_command(mail_cli)
+
+    # Hooks de perfilado (solo se registran si están habilitados)
+    from profiling import init_profiling
+    init_profiling(app)
 
     with app.app_context():
         db.create_all()
 
+
     return app
 
 if __name__ == '__main__':
     app = create_app()
+
+    # Iniciar el despachador de correos en segundo plano; con el reloader de debug,
+    # solo en el proceso que sirve las peticiones
+    if not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        from mailer import start_email_dispatcher
+        start_email_dispatcher(app)
+
     app.run()
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_
+from models import db, Meeting, Timeslot, FinalDate, TimeslotArchive
+
+
+def load_timeslots(meeting_id):
+    """
+    Obtiene los timeslots de una reunión, hidratándolos desde el archivo si la reunión está archivada.
+    """
+    archive = db.session.get(TimeslotArchive, meeting_id)
+    if archive is not None:
+        return archive.rows()
+    return Timeslot.query.filter_by(meeting_id=meeting_id).all()
+
+
+def find_archivable_meetings(limit, expire_days):
+    """
+    Busca reuniones sin archivar que ya tienen fecha final, o cuya última fecha propuesta
+    es anterior a expire_days días atrás.
+    """
+    cutoff = (datetime.utcnow() - timedelta(days=expire_days)).date()
+
+    last_dates = db.session.query(
+        Timeslot.meeting_id, func.max(Timeslot.date).label('last_date')
+    ).group_by(Timeslot.meeting_id).subquery()
+
+    return [row.id for row in db.session.query(Meeting.id).outerjoin(
+        last_dates, last_dates.c.meeting_id == Meeting.id
+    ).filter(
+        Meeting.archived_at.is_(None),
+        or_(
+            Meeting.id.in_(db.session.query(FinalDate.meeting_id)),
+            last_dates.c.last_date < cutoff
+        )
+    ).order_by(Meeting.id).limit(limit)]
+
+
+def archive_meeting(meeting_id):
+    """
+    Mueve los timeslots de una reunión a timeslot_archive dentro de la transacción actual.
+    """
+    # Bloquea la reunión antes de leer sus timeslots: las escrituras de disponibilidad toman el mismo
+    # bloqueo, así que ninguna puede confirmarse entre la lectura y el borrado
+    locked = db.session.query(Meeting.archived_at).filter_by(id=meeting_id).with_for_update().first()
+    if locked is None or locked.archived_at is not None:
+        return 0
+
+    timeslots = db.session.query(Timeslot).filter_by(meeting_id=meeting_id).order_by(Timeslot.id).all()
+
+    db.session.add(TimeslotArchive(
+        meeting_id=meeting_id,
+        payload=TimeslotArchive.pack(timeslots),
+        row_count=len(timeslots),
+        available_count=sum(1 for t in timeslots if t.available)
+    ))
+    Timeslot.query.filter_by(meeting_id=meeting_id).delete(synchronize_session=False)
+    db.session.query(Meeting).filter_by(id=meeting_id).update(
+        {'archived_at': datetime.utcnow()}, synchronize_session=False
+    )
+    return len(timeslots)
+
+
+def archive_meetings(batch_size=50, max_batches=None, expire_days=90, progress=None):
+    """
+    Archiva reuniones en lotes acotados, confirmando cada lote por separado.
+
+    :param max_batches: Número máximo de lotes a procesar en esta ejecución (None = hasta terminar).
+    :param progress: Función opcional que recibe (reuniones, timeslots) tras cada lote.
+    :return: Una tupla (reuniones archivadas, timeslots movidos).
+    """
+    archived_meetings = 0
+    archived_timeslots = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        meeting_ids = find_archivable_meetings(batch_size, expire_days)
+        if not meeting_ids:
+            break
+
+        try:
+            for meeting_id in meeting_ids:
+                archived_timeslots += archive_meeting(meeting_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        archived_meetings += len(meeting_ids)
+        batches += 1
+        if progress:
+            progress(archived_meetings, archived_timeslots)
+
+    return archived_meetings, archived_timeslots
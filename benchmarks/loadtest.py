@@ -0,0 +1,384 @@
+"""
+Prueba de carga concurrente con una mezcla realista de operaciones.
+
+Levanta la app en un servidor WSGI real (werkzeug con hilos o con procesos) contra una base de
+datos temporal de SQLite (o la que se indique con --database-uri), y ejecuta clientes en paralelo
+que reproducen una mezcla configurable de operaciones:
+
+- create_meeting: POST /meetings
+- add_guest: POST /meetings/<id>/add_guest
+- toggle: POST /update_timeslot (concentrado en unas pocas reuniones "calientes")
+- poll: GET /meetings/<id>
+- final_date: GET /meetings/<id>/final_date/<final_date_id>/summary
+
+Reporta throughput, latencias p50/p95/p99, errores "database is locked" y reintentos a lo largo
+del tiempo, y agrega un registro por ejecución a un archivo JSONL para comparar configuraciones.
+
+Uso:
+    python benchmarks/loadtest.py --duration 30 --clients 16 --mix toggle=20,poll=10,add_guest=2
+    python benchmarks/loadtest.py --server processes --processes 4 --config WRITE_CONCURRENCY_LIMIT=8
+"""
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+DEFAULT_MIX = 'create_meeting=1,add_guest=3,toggle=20,poll=10,final_date=2'
+DEFAULT_RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'loadtest_results.jsonl')
+START_DATE = date.today() + timedelta(days=7)
+
+
+def serve(config, port, threaded, processes):
+    """Proceso del servidor: crea la app y la sirve con werkzeug."""
+    sys.path.insert(0, ROOT)
+    from werkzeug.serving import run_simple
+    from app import create_app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app = create_app(config)
+    run_simple('127.0.0.1', port, app, threaded=threaded, processes=processes, use_reloader=False)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ('create_meeting', 'add_guest', 'toggle', 'poll', 'final_date'):
+            raise argparse.ArgumentTypeError(f'Unknown operation in mix: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_config(values):
+    config = {}
+    for value in values:
+        key, _, raw = value.partition('=')
+        try:
+            config[key] = json.loads(raw)
+        except ValueError:
+            config[key] = raw
+    return config
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Client:
+    """Cliente HTTP mínimo que clasifica cada respuesta y reintenta los errores transitorios."""
+    def __init__(self, port, retries):
+        self.port = port
+        self.retries = retries
+
+    def request(self, method, path, body=None):
+        """
+        Retorna (resultado, status, datos, reintentos). El resultado es ok, locked, throttled o error.
+        """
+        retries = 0
+        while True:
+            connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+            try:
+                payload = json.dumps(body) if body is not None else None
+                headers = {'Content-Type': 'application/json'} if payload else {}
+                connection.request(method, path, body=payload, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+                status = response.status
+                retry_after = response.getheader('Retry-After')
+            except (OSError, http.client.HTTPException):
+                status, data, retry_after = 0, b'', None
+            finally:
+                connection.close()
+
+            if 200 <= status < 400:
+                outcome = 'ok'
+            elif status >= 500 and b'database is locked' in data:
+                outcome = 'locked'
+            elif status in (429, 503):
+                outcome = 'throttled'
+            else:
+                outcome = 'error'
+
+            if outcome in ('locked', 'throttled') and retries < self.retries:
+                retries += 1
+                delay = min(float(retry_after), 2.0) if retry_after else 0.05 * 2 ** retries
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                continue
+            return outcome, status, data, retries
+
+
+class Workload:
+    """Estado compartido de la prueba: reuniones creadas, sus participantes y sus fechas finales."""
+    def __init__(self, client, hot_meetings):
+        self.client = client
+        self.hot_meetings = hot_meetings
+        self.lock = threading.Lock()
+        self.meetings = []       # [(meeting_id, [user_ids])]
+        self.final_dates = []    # [(meeting_id, final_date_id)]
+
+    def pick_meeting(self):
+        with self.lock:
+            if not self.meetings:
+                return None
+            # La mayoría del tráfico va a unas pocas reuniones, como ocurre en la práctica
+            if random.random() < 0.8:
+                return random.choice(self.meetings[:self.hot_meetings])
+            return random.choice(self.meetings)
+
+    def create_meeting(self):
+        email = f'creator-{uuid.uuid4().hex}@loadtest.local'
+        result = self.client.request('POST', '/meetings', {
+            'title': 'Load test meeting', 'creator_name': 'Creator', 'creator_email': email
+        })
+        if result[0] == 'ok':
+            data = json.loads(result[2])
+            with self.lock:
+                self.meetings.append((data['meeting']['id'], [data['meeting']['creator_id']]))
+        return result
+
+    def add_guest(self, meeting=None):
+        meeting = meeting or self.pick_meeting()
+        if meeting is None:
+            return self.create_meeting()
+        email = f'guest-{uuid.uuid4().hex}@loadtest.local'
+        result = self.client.request('POST', f'/meetings/{meeting[0]}/add_guest', {'name': 'Guest', 'email': email})
+        if result[0] == 'ok':
+            with self.lock:
+                meeting[1].append(json.loads(result[2])['user']['id'])
+        return result
+
+    def toggle(self, meeting=None):
+        meeting = meeting or self.pick_meeting()
+        if meeting is None:
+            return self.create_meeting()
+        return self.client.request('POST', '/update_timeslot', {
+            'meeting_id': meeting[0],
+            'user_id': random.choice(meeting[1]),
+            'date': (START_DATE + timedelta(days=random.randrange(14))).isoformat(),
+            'block': random.randint(1, 3),
+            'available': random.random() < 0.6
+        })
+
+    def poll(self):
+        meeting = self.pick_meeting()
+        if meeting is None:
+            return self.create_meeting()
+        return self.client.request('GET', f'/meetings/{meeting[0]}')
+
+    def final_date(self):
+        with self.lock:
+            final = random.choice(self.final_dates) if self.final_dates else None
+        if final is None:
+            return self.poll()
+        return self.client.request('GET', f'/meetings/{final[0]}/final_date/{final[1]}/summary')
+
+    def seed(self, meetings, guests, finalized):
+        """Crea las reuniones iniciales con invitados y disponibilidad, y finaliza algunas."""
+        for _ in range(meetings):
+            self.create_meeting()
+        for meeting in list(self.meetings):
+            for _ in range(guests):
+                self.add_guest(meeting)
+            for _ in range(guests * 3):
+                self.toggle(meeting)
+        for meeting_id, _ in self.meetings[-finalized:] if finalized else []:
+            self.client.request('POST', '/meetings/series/schedule', {'meeting_ids': [meeting_id], 'time_budget_ms': 50})
+            outcome, _, data, _ = self.client.request('GET', f'/meetings/{meeting_id}')
+            if outcome == 'ok' and json.loads(data)['final_date']:
+                self.final_dates.append((meeting_id, json.loads(data)['final_date']['id']))
+
+
+class Recorder:
+    """Acumula resultados por segundo y por operación."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.seconds = {}
+        self.operations = {}
+
+    def record(self, operation, outcome, latency, retries):
+        second = int(time.monotonic() - self.started)
+        with self.lock:
+            for bucket in (self.seconds.setdefault(second, new_bucket()), self.operations.setdefault(operation, new_bucket())):
+                bucket['requests'] += 1
+                bucket[outcome] += 1
+                bucket['retries'] += retries
+                bucket['latencies'].append(latency)
+
+
+def new_bucket():
+    return {'requests': 0, 'ok': 0, 'locked': 0, 'throttled': 0, 'error': 0, 'retries': 0, 'latencies': []}
+
+
+def summarize(bucket, duration=None):
+    latencies = bucket['latencies']
+    summary = {key: value for key, value in bucket.items() if key != 'latencies'}
+    summary.update({
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        'max_ms': round(max(latencies) * 1000, 2) if latencies else None,
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+    })
+    if duration:
+        summary['throughput'] = round(bucket['ok'] / duration, 2)
+    return summary
+
+
+def run_clients(workload, recorder, mix, clients, duration):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    deadline = time.monotonic() + duration
+
+    def loop():
+        while time.monotonic() < deadline:
+            operation = random.choices(names, weights)[0]
+            started = time.monotonic()
+            outcome, _, _, retries = getattr(workload, operation)()
+            recorder.record(operation, outcome, time.monotonic() - started, retries)
+
+    threads = [threading.Thread(target=loop, daemon=True) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+
+    # Reporte periódico mientras corre la prueba
+    reported = 0
+    while any(thread.is_alive() for thread in threads):
+        time.sleep(1)
+        elapsed = int(time.monotonic() - recorder.started)
+        if elapsed - reported >= 5 or not any(thread.is_alive() for thread in threads):
+            window = new_bucket()
+            with recorder.lock:
+                for second in range(reported, elapsed):
+                    for key, value in recorder.seconds.get(second, new_bucket()).items():
+                        window[key] += value
+            stats = summarize(window, max(elapsed - reported, 1))
+            print(f'[{elapsed:>4}s] {stats["throughput"]:>8.1f} ok/s  p50 {stats["p50_ms"]} ms  '
+                  f'p99 {stats["p99_ms"]} ms  locked {stats["locked"]}  throttled {stats["throttled"]}  '
+                  f'errors {stats["error"]}  retries {stats["retries"]}')
+            reported = elapsed
+
+    for thread in threads:
+        thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=int, default=30, help='Seconds of load after seeding.')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent client threads.')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f'Operation weights (default {DEFAULT_MIX}).')
+    parser.add_argument('--server', choices=['threaded', 'processes'], default='threaded', help='werkzeug server mode.')
+    parser.add_argument('--processes', type=int, default=4, help='Server processes when --server processes.')
+    parser.add_argument('--database-uri', help='Database to test against (default: a temporary SQLite file).')
+    parser.add_argument('--meetings', type=int, default=20, help='Meetings created before the load starts.')
+    parser.add_argument('--guests', type=int, default=5, help='Guests per seeded meeting.')
+    parser.add_argument('--finalized', type=int, default=5, help='Seeded meetings that get a final date.')
+    parser.add_argument('--hot-meetings', type=int, default=3, help='Meetings receiving 80%% of the traffic.')
+    parser.add_argument('--retries', type=int, default=3, help='Retries for locked or throttled responses.')
+    parser.add_argument('--config', action='append', default=[], metavar='KEY=VALUE',
+                        help='App config override (value parsed as JSON when possible). Repeatable.')
+    parser.add_argument('--label', default='', help='Free text stored with the results.')
+    parser.add_argument('--results', default=DEFAULT_RESULTS, help='JSONL file the run is appended to.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed.')
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {
+            'SQLALCHEMY_DATABASE_URI': args.database_uri or f'sqlite:///{os.path.join(tmp, "loadtest.db")}',
+            'MAIL_DISPATCHER_ENABLED': False,
+            'RATELIMIT_ENABLED': False,
+            'DEBUG': False,
+        }
+        config.update(parse_config(args.config))
+
+        port = free_port()
+        threaded = args.server == 'threaded'
+        processes = 1 if threaded else args.processes
+        server = multiprocessing.get_context('spawn').Process(
+            target=serve, args=(config, port, threaded, processes), daemon=True
+        )
+        server.start()
+
+        client = Client(port, args.retries)
+        for _ in range(100):
+            if client.request('GET', '/')[0] == 'ok':
+                break
+            time.sleep(0.1)
+        else:
+            server.terminate()
+            sys.exit('Server did not start')
+
+        try:
+            workload = Workload(client, args.hot_meetings)
+            print(f'Seeding {args.meetings} meetings ...')
+            workload.seed(args.meetings, args.guests, args.finalized)
+
+            print(f'Running {args.clients} clients for {args.duration}s against {args.server} server')
+            recorder = Recorder()
+            run_clients(workload, recorder, args.mix, args.clients, args.duration)
+        finally:
+            server.terminate()
+            server.join()
+
+    total = new_bucket()
+    for bucket in recorder.operations.values():
+        for key, value in bucket.items():
+            total[key] += value
+
+    result = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'label': args.label,
+        'settings': {
+            'duration': args.duration,
+            'clients': args.clients,
+            'mix': args.mix,
+            'server': args.server,
+            'processes': processes,
+            'database': 'sqlite-temp' if not args.database_uri else args.database_uri.split('://')[0],
+            'retries': args.retries,
+            'config': parse_config(args.config),
+        },
+        'summary': summarize(total, args.duration),
+        'operations': {name: summarize(bucket, args.duration) for name, bucket in sorted(recorder.operations.items())},
+        'timeline': [
+            {'second': second, **summarize(bucket)} for second, bucket in sorted(recorder.seconds.items())
+        ],
+    }
+
+    print('\noperation        requests      ok  locked  throttled  errors  retries    p50 ms    p99 ms')
+    for name, stats in list(result['operations'].items()) + [('TOTAL', result['summary'])]:
+        print(f'{name:<15} {stats["requests"]:>9} {stats["ok"]:>7} {stats["locked"]:>7} {stats["throttled"]:>10} '
+              f'{stats["error"]:>7} {stats["retries"]:>8} {stats["p50_ms"] or 0:>9} {stats["p99_ms"] or 0:>9}')
+    print(f'\nThroughput: {result["summary"]["throughput"]} ok/s')
+
+    with open(args.results, 'a') as results_file:
+        results_file.write(json.dumps(result) + '\n')
+    print(f'Results appended to {args.results}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Compara la serialización de una reunión con miles de timeslots:
+
+- orm+stdlib: Meeting.query.get() + jsonify(meeting.serialize()) con el proveedor JSON por defecto de Flask
+- orm+fast: el mismo camino con FastJSONProvider (orjson si está instalado)
+- core rows: serializers.meeting_json() directamente sobre filas Core
+
+Uso: python benchmarks/serialize_bench.py [--timeslots 6000] [--repeat 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import json, jsonify
+from flask.json.provider import DefaultJSONProvider
+from app import create_app
+from json_provider import FastJSONProvider, orjson
+from models import db, Meeting, Timeslot, User
+from serializers import meeting_json
+
+
+def seed(timeslots):
+    user = User(name='Bench', email='bench@example.com')
+    db.session.add(user)
+    db.session.flush()
+    meeting = Meeting(title='Bench', description='Serialization benchmark', creator_id=user.id, password_hash='0' * 64)
+    db.session.add(meeting)
+    db.session.flush()
+
+    start = date(2026, 1, 1)
+    db.session.execute(Timeslot.__table__.insert(), [
+        {
+            'meeting_id': meeting.id,
+            'user_id': 1 + i // 300,
+            'date': start + timedelta(days=(i // 3) % 100),
+            'block': 1 + i % 3,
+            'available': i % 2 == 0
+        }
+        for i in range(timeslots)
+    ])
+    db.session.commit()
+    return meeting.id
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        db.session.expire_all()
+        started = time.perf_counter()
+        body = function()
+        timings.append(time.perf_counter() - started)
+    return body, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--timeslots', type=int, default=6000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(tmp, "bench.db")}',
+            'MAIL_DISPATCHER_ENABLED': False,
+            'RATELIMIT_ENABLED': False,
+            'DEBUG': False,
+        })
+        with app.test_request_context():
+            meeting_id = seed(args.timeslots)
+
+            def orm_path():
+                return jsonify(db.session.get(Meeting, meeting_id).serialize()).get_data()
+
+            def core_path():
+                return meeting_json(meeting_id)
+
+            app.json = DefaultJSONProvider(app)
+            reference, orm_stdlib = measure(orm_path, args.repeat)
+            app.json = FastJSONProvider(app)
+            fast_body, orm_fast = measure(orm_path, args.repeat)
+            core_body, core_rows = measure(core_path, args.repeat)
+
+            expected = json.loads(reference)
+            assert json.loads(fast_body) == expected, 'FastJSONProvider output differs'
+            assert json.loads(core_body) == expected, 'Core row serializer output differs'
+
+        print(f'{args.timeslots} timeslots, {args.repeat} runs, orjson {"installed" if orjson else "not installed"}')
+        baseline = statistics.median(orm_stdlib)
+        for name, timings, body in (
+            ('orm+stdlib', orm_stdlib, reference),
+            ('orm+fast', orm_fast, fast_body),
+            ('core rows', core_rows, core_body),
+        ):
+            median = statistics.median(timings)
+            print(f'{name:<12} median {median * 1000:8.2f} ms   min {min(timings) * 1000:8.2f} ms   '
+                  f'{baseline / median:5.2f}x   {len(body)} bytes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import time
+import click
+from flask.cli import AppGroup
+
+# Comandos de mantenimiento: flask maintenance <comando>
+maintenance_cli = AppGroup('maintenance', help='Maintenance jobs for the WeMeet database.')
+
+
+@maintenance_cli.command('archive')
+@click.option('--batch-size', default=50, show_default=True, help='Meetings archived per transaction.')
+@click.option('--max-batches', default=None, type=int, help='Stop after this many batches (default: until done).')
+@click.option('--expire-days', default=90, show_default=True,
+              help='Archive meetings without a final date whose last proposed date is older than this.')
+def archive_command(batch_size, max_batches, expire_days):
+    """Move timeslots of finalized or expired meetings to the archive table."""
+    from archive import archive_meetings
+
+    def progress(meetings, timeslots):
+        click.echo(f'Archived {meetings} meetings ({timeslots} timeslots)')
+
+    meetings, timeslots = archive_meetings(batch_size, max_batches, expire_days, progress)
+    click.echo(f'Done: {meetings} meetings archived, {timeslots} timeslots moved')
+
+
+@maintenance_cli.command('rerank')
+@click.option('--workers', default=4, show_default=True, help='Worker processes.')
+@click.option('--chunk-size', default=500, show_default=True, help='Meetings per partition handed to a worker.')
+@click.option('--batch-size', default=200, show_default=True, help='Meetings updated per write transaction.')
+@click.option('--dry-run', is_flag=True, help='Only report discrepancies, do not write.')
+def rerank_command(workers, chunk_size, batch_size, dry_run):
+    """Recompute rankings, final-date candidates and guest counts for every meeting."""
+    from models import db, Meeting
+    from rerank import rerank_all
+
+    meeting_ids = [row.id for row in db.session.query(Meeting.id).order_by(Meeting.id)]
+    database_uri = db.engine.url.render_as_string(hide_password=False)
+    click.echo(f'Re-ranking {len(meeting_ids)} meetings with {workers} workers{" (dry run)" if dry_run else ""}')
+
+    def progress(totals):
+        rate = totals['meetings'] / totals['elapsed'] if totals['elapsed'] else 0
+        click.echo(
+            f'{totals["meetings"]}/{len(meeting_ids)} meetings, {totals["timeslots"]} timeslots, '
+            f'{totals["discrepancies"]} discrepancies, {totals["updated"]} updated ({rate:.0f} meetings/s)'
+        )
+
+    totals = rerank_all(database_uri, meeting_ids, workers, chunk_size, batch_size, dry_run, progress)
+
+    for detail in totals['details']:
+        click.echo(f'Meeting {detail["meeting_id"]}: {"; ".join(detail["problems"])}')
+    if totals['discrepancies'] > len(totals['details']):
+        click.echo(f'... and {totals["discrepancies"] - len(totals["details"])} more')
+    click.echo(
+        f'Done in {totals["elapsed"]:.1f}s: {totals["meetings"]} meetings, {totals["timeslots"]} timeslots, '
+        f'{totals["discrepancies"]} discrepancies, {totals["updated"]} updated'
+    )
+
+
+# Comandos del envío de correos: flask mail <comando>
+mail_cli = AppGroup('mail', help='Invitation email jobs.')
+
+
+@mail_cli.command('dispatch')
+def dispatch_command():
+    """Send pending outbox emails until interrupted (for servers that do not run app.py)."""
+    from flask import current_app
+    from mailer import EmailDispatcher
+
+    dispatcher = EmailDispatcher(current_app._get_current_object())
+    dispatcher.start()
+    click.echo(f'Dispatching emails with {dispatcher.workers} workers (Ctrl+C to stop)')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        click.echo('Stopping dispatcher')
+    finally:
+        dispatcher.stop()
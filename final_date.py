@@ -1,5 +1,5 @@
 from collections import defaultdict
-from models import Timeslot  # Asegúrate de importar tu modelo Timeslot
+from archive import load_timeslots
 
 def calculate_final_date(meeting_id):
     """
@@ -10,8 +10,8 @@ def calculate_final_date(meeting_id):
     """
     date_counter = defaultdict(int)
 
-    # Recuperar todos los bloques de tiempo (timeslots) asociados a la reunión
-    timeslots = Timeslot.query.filter_by(meeting_id=meeting_id).all()
+    # Recuperar todos los bloques de tiempo (timeslots) asociados a la reunión, incluso si está archivada
+    timeslots = load_timeslots(meeting_id)
 
     # Contar cuántas veces aparece cada fecha en los bloques de tiempo
     for timeslot in timeslots:
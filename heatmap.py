@@ -0,0 +1,114 @@
+import json
+import threading
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import and_, null, union_all
+from models import db, Timeslot, TimeslotArchive, guest_participation
+
+# Caché de payloads ya codificados: meeting_id -> (clave de versión, JSON codificado)
+_heatmap_cache = OrderedDict()
+_heatmap_cache_lock = threading.Lock()
+
+BLOCKS = [1, 2, 3]
+
+
+def build_heatmap(meeting):
+    """
+    Construye el heatmap de disponibilidad de una reunión en formato columnar.
+
+    Las celdas (fecha, bloque) se describen con arreglos paralelos: índice de fecha, bloque,
+    cantidad de participantes disponibles y un bitmap (en hexadecimal) con los índices de
+    esos participantes en la tabla de colores.
+    """
+    if meeting.archived_at:
+        # Reunión archivada: los participantes vienen de user_meeting y la disponibilidad del archivo
+        archive = db.session.get(TimeslotArchive, meeting.id)
+        colors_by_user = dict(db.session.execute(
+            db.select(guest_participation.c.user_id, guest_participation.c.color)
+            .where(guest_participation.c.meeting_id == meeting.id)
+        ).all())
+        rows = [(user_id, color, None, None) for user_id, color in colors_by_user.items()]
+        rows += [
+            (t.user_id, colors_by_user.get(t.user_id), t.date, t.block)
+            for t in (archive.rows() if archive else []) if t.available
+        ]
+    else:
+        # Participantes de la reunión (aunque no hayan marcado disponibilidad)
+        participants = db.select(
+            guest_participation.c.user_id,
+            guest_participation.c.color,
+            null().label('date'),
+            null().label('block')
+        ).where(guest_participation.c.meeting_id == meeting.id)
+
+        # Disponibilidad marcada, con el color de quien la marcó
+        availability = db.select(
+            Timeslot.user_id,
+            guest_participation.c.color,
+            Timeslot.date,
+            Timeslot.block
+        ).select_from(Timeslot).outerjoin(
+            guest_participation,
+            and_(guest_participation.c.meeting_id == Timeslot.meeting_id,
+                 guest_participation.c.user_id == Timeslot.user_id)
+        ).where(Timeslot.meeting_id == meeting.id, Timeslot.available.is_(True))
+
+        # La disponibilidad va primero para que la unión tome los tipos de sus columnas
+        rows = db.session.execute(union_all(availability, participants)).all()
+
+    colors = {}
+    cells = {}
+    for user_id, color, date, block in rows:
+        if color is not None or user_id not in colors:
+            colors[user_id] = color
+        if date is not None:
+            cells.setdefault((date, block), set()).add(user_id)
+
+    user_ids = sorted(colors)
+    user_index = {user_id: index for index, user_id in enumerate(user_ids)}
+    dates = sorted({date for date, _ in cells})
+    date_index = {date: index for index, date in enumerate(dates)}
+
+    columns = {'date_index': [], 'block': [], 'count': [], 'mask': []}
+    for (date, block), users in sorted(cells.items()):
+        mask = 0
+        for user_id in users:
+            mask |= 1 << user_index[user_id]
+        columns['date_index'].append(date_index[date])
+        columns['block'].append(block)
+        columns['count'].append(len(users))
+        columns['mask'].append(format(mask, 'x'))
+
+    return {
+        'meeting_id': meeting.id,
+        'version': meeting.version,
+        'participants': {
+            'user_ids': user_ids,
+            'colors': [colors[user_id] for user_id in user_ids]
+        },
+        'dates': [date.isoformat() for date in dates],
+        'blocks': BLOCKS,
+        'cells': columns
+    }
+
+
+def get_heatmap(meeting):
+    """
+    Retorna el heatmap codificado en JSON, reutilizando la caché mientras la versión de la reunión no cambie.
+    """
+    cache_key = (meeting.version, meeting.created_at)
+    with _heatmap_cache_lock:
+        cached = _heatmap_cache.get(meeting.id)
+        if cached is not None and cached[0] == cache_key:
+            _heatmap_cache.move_to_end(meeting.id)
+            return cached[1]
+
+    body = json.dumps(build_heatmap(meeting), separators=(',', ':'))
+
+    with _heatmap_cache_lock:
+        _heatmap_cache[meeting.id] = (cache_key, body)
+        _heatmap_cache.move_to_end(meeting.id)
+        while len(_heatmap_cache) > current_app.config['HEATMAP_CACHE_SIZE']:
+            _heatmap_cache.popitem(last=False)
+
+    return body
@@ -0,0 +1,203 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, request, abort, make_response, Response
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from models import db, IdempotencyRecord
+
+# status_code de un registro reservado cuya petición todavía se está ejecutando
+PENDING = 0
+
+# Locks por franjas para que los reintentos concurrentes de una misma clave se atiendan de a uno
+_key_locks = [threading.Lock() for _ in range(64)]
+
+
+class IdempotencyCache:
+    """
+    Caché en memoria (LRU con TTL) delante de la tabla idempotency_record.
+    Guarda tuplas (request_hash, status_code, response_body, expires_at).
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, scope):
+        with self._lock:
+            entry = self._entries.get(scope)
+            if entry is None:
+                return None
+            if entry[3] <= time.time():
+                del self._entries[scope]
+                return None
+            self._entries.move_to_end(scope)
+            return entry
+
+    def set(self, scope, entry):
+        with self._lock:
+            self._entries[scope] = entry
+            self._entries.move_to_end(scope)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def init_idempotency(app):
+    app.extensions['idempotency_cache'] = IdempotencyCache(app.config['IDEMPOTENCY_CACHE_SIZE'])
+    app.extensions['idempotency_stores'] = 0
+
+
+def get_scope(key):
+    return hashlib.sha256(f'{request.method} {request.path} {key}'.encode()).hexdigest()
+
+
+def claim_record(scope, request_hash):
+    """
+    Reserva la clave insertando un registro pendiente (status_code 0) antes de ejecutar la vista.
+    La reserva es visible para todos los procesos, y vence a los IDEMPOTENCY_PENDING_TIMEOUT segundos
+    por si la petición que la tomó nunca termina.
+
+    :return: None si la reserva quedó tomada por esta petición, o el IdempotencyRecord existente.
+    """
+    now = datetime.utcnow()
+    lease = now + timedelta(seconds=current_app.config['IDEMPOTENCY_PENDING_TIMEOUT'])
+    try:
+        db.session.add(IdempotencyRecord(
+            scope=scope,
+            request_hash=request_hash,
+            status_code=PENDING,
+            response_body='',
+            created_at=now,
+            expires_at=lease
+        ))
+        db.session.commit()
+        return None
+    except IntegrityError:
+        db.session.rollback()
+
+    # El registro existente venció (respuesta expirada o reserva abandonada): se toma de nuevo
+    taken = IdempotencyRecord.query.filter(
+        IdempotencyRecord.scope == scope, IdempotencyRecord.expires_at <= now
+    ).update({
+        'request_hash': request_hash, 'status_code': PENDING, 'response_body': '',
+        'created_at': now, 'expires_at': lease
+    }, synchronize_session=False)
+    db.session.commit()
+    if taken:
+        return None
+    return db.session.query(IdempotencyRecord).filter_by(scope=scope).populate_existing().first()
+
+
+def release_record(scope):
+    """Libera una reserva pendiente cuando la petición falló, para que un reintento pueda ejecutarse."""
+    db.session.rollback()
+    try:
+        IdempotencyRecord.query.filter_by(scope=scope, status_code=PENDING).delete(synchronize_session=False)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        current_app.logger.exception('Error releasing idempotency record')
+
+
+def store_record(scope, request_hash, response):
+    """Completa la reserva con la respuesta exitosa."""
+    ttl = current_app.config['IDEMPOTENCY_TTL']
+    body = response.get_data(as_text=True)
+    now = datetime.utcnow()
+
+    try:
+        IdempotencyRecord.query.filter_by(scope=scope).update({
+            'status_code': response.status_code,
+            'response_body': body,
+            'created_at': now,
+            'expires_at': now + timedelta(seconds=ttl)
+        }, synchronize_session=False)
+        db.session.commit()
+    except SQLAlchemyError:
+        # La transacción principal ya se confirmó: no fallar la petición por la caché
+        db.session.rollback()
+        current_app.logger.exception('Error storing idempotency record')
+        return
+
+    current_app.extensions['idempotency_cache'].set(
+        scope, (request_hash, response.status_code, body, time.time() + ttl)
+    )
+
+    current_app.extensions['idempotency_stores'] += 1
+    if current_app.extensions['idempotency_stores'] % current_app.config['IDEMPOTENCY_PURGE_EVERY'] == 0:
+        purge_records()
+
+
+def purge_records():
+    """Elimina los registros vencidos y mantiene la tabla bajo IDEMPOTENCY_MAX_RECORDS."""
+    try:
+        IdempotencyRecord.query.filter(IdempotencyRecord.expires_at <= datetime.utcnow()).delete(synchronize_session=False)
+
+        overflow = IdempotencyRecord.query.count() - current_app.config['IDEMPOTENCY_MAX_RECORDS']
+        if overflow > 0:
+            oldest = db.session.query(IdempotencyRecord.scope).order_by(IdempotencyRecord.created_at).limit(overflow)
+            IdempotencyRecord.query.filter(IdempotencyRecord.scope.in_(oldest.scalar_subquery())).delete(synchronize_session=False)
+
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        current_app.logger.exception('Error purging idempotency records')
+
+
+def idempotent(view):
+    """
+    Hace idempotente un endpoint POST mediante el header Idempotency-Key.
+    La primera respuesta exitosa se guarda y los reintentos con la misma clave la reciben
+    de nuevo sin volver a ejecutar la transacción.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > 255:
+            abort(400, 'Idempotency-Key must be at most 255 characters')
+
+        scope = get_scope(key)
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+
+        # Los reintentos concurrentes en este proceso se atienden de a uno; entre procesos
+        # los separa la reserva en la tabla
+        with _key_locks[int(scope[:8], 16) % len(_key_locks)]:
+            entry = current_app.extensions['idempotency_cache'].get(scope)
+            if entry is None:
+                try:
+                    record = claim_record(scope, request_hash)
+                except SQLAlchemyError as e:
+                    db.session.rollback()
+                    abort(500, f'Error checking Idempotency-Key: {str(e)}')
+
+                if record is not None:
+                    if record.request_hash != request_hash:
+                        abort(422, 'Idempotency-Key was already used with a different request')
+                    if record.status_code == PENDING:
+                        abort(409, 'A request with this Idempotency-Key is still being processed')
+                    entry = (record.request_hash, record.status_code, record.response_body,
+                             time.time() + (record.expires_at - datetime.utcnow()).total_seconds())
+                    current_app.extensions['idempotency_cache'].set(scope, entry)
+
+            if entry is not None:
+                if entry[0] != request_hash:
+                    abort(422, 'Idempotency-Key was already used with a different request')
+                return Response(entry[2], status=entry[1], mimetype='application/json',
+                                headers={'Idempotent-Replayed': 'true'})
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                release_record(scope)
+                raise
+            if 200 <= response.status_code < 300:
+                store_record(scope, request_hash, response)
+            else:
+                release_record(scope)
+            return response
+
+    return wrapper
@@ -0,0 +1,34 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa el módulo json de la librería estándar
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Proveedor JSON que usa orjson cuando está instalado y, si no, el comportamiento por defecto de Flask.
+    Las fechas y los tipos desconocidos pasan por el mismo default de Flask, así que la salida es equivalente.
+    """
+    def dumps(self, obj, **kwargs):
+        format_args = {key: kwargs.pop(key) for key in ('indent', 'separators') if key in kwargs}
+        indent = format_args.get('indent')
+        if orjson is None or kwargs or indent not in (None, 2):
+            return super().dumps(obj, **kwargs, **format_args)
+
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode()
+        except TypeError:
+            # Por ejemplo, claves no string o enteros fuera de 64 bits
+            return super().dumps(obj, **format_args)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
@@ -0,0 +1,254 @@
+import logging
+import smtplib
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from models import db, EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# Tiempo máximo que un mensaje puede quedar "sending" antes de volver a reclamarse
+CLAIM_LEASE_SECONDS = 300
+# Límite superior de espera entre reintentos
+MAX_BACKOFF_SECONDS = 3600
+
+
+def enqueue_invitation(meeting, user, invite_link):
+    """
+    Agrega a la sesión actual el correo de invitación de un invitado.
+    No hace commit: el mensaje se guarda en la misma transacción que la inserción en user_meeting.
+    """
+    message = EmailOutbox(
+        meeting_id=meeting.id,
+        recipient=user.email,
+        subject=f'You have been invited to {meeting.title}',
+        body=(
+            f'Hi {user.name},\n\n'
+            f'You have been invited to the meeting "{meeting.title}".\n'
+            f'Submit your availability here: {invite_link}\n'
+        )
+    )
+    db.session.add(message)
+    return message
+
+
+def compute_backoff(attempts, base_seconds):
+    """Calcula la espera exponencial antes del siguiente intento."""
+    return min(base_seconds * (2 ** max(attempts - 1, 0)), MAX_BACKOFF_SECONDS)
+
+
+class SMTPConnection:
+    """
+    Conexión SMTP persistente. Cada hilo del pool mantiene la suya y la reutiliza entre lotes.
+    """
+    def __init__(self, config):
+        self.config = config
+        self._smtp = None
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.config['MAIL_SERVER'], self.config['MAIL_PORT'], timeout=30)
+        if self.config.get('MAIL_USE_TLS'):
+            smtp.starttls()
+        if self.config.get('MAIL_USERNAME'):
+            smtp.login(self.config['MAIL_USERNAME'], self.config['MAIL_PASSWORD'])
+        return smtp
+
+    def send(self, message):
+        if self._smtp is None:
+            self._smtp = self._connect()
+        try:
+            self._smtp.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # El servidor cerró la conexión ociosa: reconectar una vez y reintentar
+            self._smtp = self._connect()
+            self._smtp.send_message(message)
+
+    def reset(self):
+        self.close()
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+            self._smtp = None
+
+
+class EmailDispatcher:
+    """
+    Despachador en segundo plano del outbox de correos.
+    Reclama lotes de mensajes pendientes, los reparte entre un pool de hilos con conexiones
+    SMTP persistentes y registra el resultado, reintentando con espera exponencial.
+    """
+    def __init__(self, app):
+        self.app = app
+        self.workers = app.config['MAIL_WORKERS']
+        self.batch_size = app.config['MAIL_BATCH_SIZE']
+        self.poll_interval = app.config['MAIL_POLL_INTERVAL']
+        self.max_attempts = app.config['MAIL_MAX_ATTEMPTS']
+        self.retry_backoff = app.config['MAIL_RETRY_BACKOFF']
+        self.dispatcher_id = uuid.uuid4().hex
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='email-dispatcher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='email-worker') as pool:
+            while not self._stop.is_set():
+                try:
+                    processed = self.dispatch_pending(pool)
+                except Exception:
+                    logger.exception('Error dispatching pending emails')
+                    processed = 0
+                # Si el lote vino lleno puede haber más mensajes: seguir sin esperar
+                if processed < self.batch_size:
+                    self._stop.wait(self.poll_interval)
+        self._close_connections()
+
+    def dispatch_pending(self, pool=None):
+        """
+        Envía un lote de mensajes pendientes. Retorna la cantidad de mensajes procesados.
+        """
+        with self.app.app_context():
+            batch = self._claim_batch()
+            if not batch:
+                return 0
+
+            # Repartir el lote entre los hilos del pool
+            chunks = [batch[i::self.workers] for i in range(self.workers)]
+            chunks = [chunk for chunk in chunks if chunk]
+            if pool is None:
+                results = [self._send_chunk(chunk) for chunk in chunks]
+            else:
+                results = list(pool.map(self._send_chunk, chunks))
+
+            self._record_results([result for chunk in results for result in chunk])
+            return len(batch)
+
+    def _claim_batch(self):
+        """
+        Marca un lote de mensajes como 'sending' para este despachador y los retorna.
+        También recupera mensajes cuyo reclamo expiró (por ejemplo, tras una caída).
+        """
+        now = datetime.utcnow()
+        candidate_ids = [row.id for row in db.session.query(EmailOutbox.id).filter(
+            EmailOutbox.status.in_(['pending', 'sending']),
+            EmailOutbox.next_attempt_at <= now
+        ).order_by(EmailOutbox.next_attempt_at).limit(self.batch_size)]
+
+        if not candidate_ids:
+            return []
+
+        claim = f'{self.dispatcher_id}:{uuid.uuid4().hex[:8]}'
+        db.session.query(EmailOutbox).filter(
+            EmailOutbox.id.in_(candidate_ids),
+            EmailOutbox.status.in_(['pending', 'sending']),
+            EmailOutbox.next_attempt_at <= now
+        ).update({
+            'status': 'sending',
+            'claimed_by': claim,
+            'next_attempt_at': now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+        }, synchronize_session=False)
+        db.session.commit()
+
+        # Solo se envían los mensajes que este despachador logró reclamar
+        return [
+            (row.id, row.recipient, row.subject, row.body)
+            for row in db.session.query(
+                EmailOutbox.id, EmailOutbox.recipient, EmailOutbox.subject, EmailOutbox.body
+            ).filter_by(claimed_by=claim, status='sending')
+        ]
+
+    def _get_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = SMTPConnection(self.app.config)
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _send_chunk(self, chunk):
+        connection = self._get_connection()
+        results = []
+        for message_id, recipient, subject, body in chunk:
+            message = EmailMessage()
+            message['From'] = self.app.config['MAIL_DEFAULT_SENDER']
+            message['To'] = recipient
+            message['Subject'] = subject
+            message.set_content(body)
+            try:
+                connection.send(message)
+                results.append((message_id, None))
+            except (smtplib.SMTPException, OSError) as e:
+                # Descartar la conexión para que el próximo envío abra una nueva
+                connection.reset()
+                results.append((message_id, str(e) or e.__class__.__name__))
+        return results
+
+    def _record_results(self, results):
+        now = datetime.utcnow()
+        messages = {m.id: m for m in EmailOutbox.query.filter(
+            EmailOutbox.id.in_([message_id for message_id, _ in results])
+        )}
+        for message_id, error in results:
+            message = messages[message_id]
+            message.attempts += 1
+            message.claimed_by = None
+            if error is None:
+                message.status = 'sent'
+                message.sent_at = now
+                message.last_error = None
+            elif message.attempts >= self.max_attempts:
+                message.status = 'failed'
+                message.last_error = error
+                logger.warning('Giving up on email %s to %s: %s', message_id, message.recipient, error)
+            else:
+                message.status = 'pending'
+                message.last_error = error
+                message.next_attempt_at = now + timedelta(
+                    seconds=compute_backoff(message.attempts, self.retry_backoff)
+                )
+        db.session.commit()
+
+    def _close_connections(self):
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+
+
+def start_email_dispatcher(app):
+    """
+    Inicia el despachador en segundo plano si MAIL_DISPATCHER_ENABLED está activo.
+    Se llama solo al servir la app, no desde create_app, para que los comandos flask no envíen correos.
+
+    :return: El despachador iniciado, o None si está deshabilitado.
+    """
+    if not app.config['MAIL_DISPATCHER_ENABLED']:
+        return None
+    dispatcher = app.extensions.get('email_dispatcher')
+    if dispatcher is None:
+        dispatcher = app.extensions['email_dispatcher'] = EmailDispatcher(app)
+    dispatcher.start()
+    return dispatcher
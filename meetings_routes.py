@@ -1,7 +1,13 @@
-from flask import Blueprint, jsonify, request, abort
+from flask import Blueprint, jsonify, request, abort, Response, current_app
 from sqlalchemy.exc import SQLAlchemyError
-from models import db, User, Meeting, guest_participation, FinalDate, Role
-from utils import generate_random_color, generate_meeting_hash
+from models import db, User, Meeting, MeetingChange, EmailOutbox, guest_participation, FinalDate, Role
+from utils import generate_random_color, generate_meeting_hash, build_invite_link
+from mailer import enqueue_invitation
+from idempotency import idempotent
+from service import MeetingService
+from heatmap import get_heatmap
+from series import schedule_series
+from serializers import meetings_json, meeting_json
 
 meetings_bp = Blueprint('meetings', __name__)
 
@@ -21,6 +27,7 @@ def get_or_create_role(role_name):
     return role
 
 @meetings_bp.route('/meetings', methods=['POST'])
+@idempotent
 def create_meeting():
     data = request.json
     
@@ -70,7 +77,7 @@ def create_meeting():
         db.session.commit()
 
         # Crear el enlace de invitación usando el hash generado
-        invite_link = f"http://localhost:5000/meetings/{new_meeting.id}/access?hash={new_meeting.password_hash}"
+        invite_link = build_invite_link(new_meeting.id, new_meeting.password_hash)
 
         return jsonify({
             'message': 'Meeting created successfully',
@@ -88,6 +95,11 @@ def delete_meeting(meeting_id):
         meeting = Meeting.query.get_or_404(meeting_id)
 
         # Opcional: Verificar dependencias antes de eliminar
+        # El log de cambios se borra con la reunión: si SQLite reutiliza el id, la nueva reunión
+        # empieza en version 0 y chocaría con los seq anteriores
+        MeetingChange.query.filter_by(meeting_id=meeting_id).delete(synchronize_session=False)
+        # Las invitaciones aún en el outbox no deben enviarse ni quedar apuntando a otra reunión
+        EmailOutbox.query.filter_by(meeting_id=meeting_id).delete(synchronize_session=False)
         db.session.delete(meeting)
         db.session.commit()
         return jsonify({'message': 'Meeting deleted successfully'}), 200
@@ -97,15 +109,123 @@ def delete_meeting(meeting_id):
 
 @meetings_bp.route('/meetings', methods=['GET'])
 def get_all_meetings():
-    meetings = Meeting.query.all()
-    return jsonify([meeting.serialize() for meeting in meetings]), 200
+    # Serialización directa desde filas Core (ver serializers.py)
+    return Response('[' + ','.join(meetings_json()) + ']', status=200, mimetype='application/json')
 
 @meetings_bp.route('/meetings/<int:meeting_id>', methods=['GET'])
 def get_meeting_by_id(meeting_id):
-    meeting = Meeting.query.get_or_404(meeting_id)
-    return jsonify(meeting.serialize()), 200
+    body = meeting_json(meeting_id)
+    if body is None:
+        abort(404)
+    return Response(body, status=200, mimetype='application/json')
+
+@meetings_bp.route('/meetings/<int:meeting_id>/heatmap', methods=['GET'])
+def get_meeting_heatmap(meeting_id):
+    try:
+        # Solo se leen las columnas necesarias para validar la caché (sin cargar los timeslots)
+        meeting = db.session.query(
+            Meeting.id, Meeting.version, Meeting.created_at, Meeting.archived_at
+        ).filter_by(id=meeting_id).first()
+        if not meeting:
+            abort(404, 'Meeting not found')
+
+        etag = f'{meeting.id}-{meeting.version}-{int(meeting.created_at.timestamp())}'
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers={'ETag': f'"{etag}"'})
+
+        return Response(get_heatmap(meeting), status=200, mimetype='application/json', headers={'ETag': f'"{etag}"'})
+
+    except SQLAlchemyError as e:
+        abort(500, f'Error retrieving heatmap: {str(e)}')
+
+@meetings_bp.route('/meetings/series/schedule', methods=['POST'])
+def schedule_meeting_series():
+    data = request.json
+    if not data:
+        abort(400, 'Request must be JSON')
+    validate_required_fields(data, ['meeting_ids'])
+
+    meeting_ids = data['meeting_ids']
+    if not isinstance(meeting_ids, list) or not all(isinstance(meeting_id, int) for meeting_id in meeting_ids):
+        abort(400, 'meeting_ids must be a list of integers')
+
+    time_budget_ms = data.get('time_budget_ms', 500)
+    if not isinstance(time_budget_ms, int) or not 0 < time_budget_ms <= 10000:
+        abort(400, 'time_budget_ms must be an integer between 1 and 10000')
+
+    dry_run = data.get('dry_run', False)
+    if not isinstance(dry_run, bool):
+        abort(400, 'dry_run must be a boolean')
+
+    try:
+        existing = {row.id for row in db.session.query(Meeting.id).filter(Meeting.id.in_(meeting_ids))}
+        missing = [meeting_id for meeting_id in meeting_ids if meeting_id not in existing]
+        if missing:
+            abort(404, f'Meetings not found: {", ".join(map(str, missing))}')
+
+        result = schedule_series(meeting_ids, time_budget_ms / 1000, dry_run=dry_run)
+        return jsonify(result), 200 if result['dry_run'] else 201
+
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        abort(500, f'Error scheduling meeting series: {str(e)}')
+
+@meetings_bp.route('/meetings/<int:meeting_id>/changes', methods=['GET'])
+def get_meeting_changes(meeting_id):
+    try:
+        since = int(request.args.get('since', ''))
+        if since < 0:
+            raise ValueError
+    except ValueError:
+        abort(400, 'The since parameter must be a non-negative integer')
+
+    try:
+        version = db.session.query(Meeting.version).filter_by(id=meeting_id).scalar()
+        if version is None:
+            abort(404, 'Meeting not found')
+
+        changes = []
+        if since < version:
+            # Si el cliente quedó muy atrás o el log ya fue compactado, se envía el estado completo
+            behind = version - since
+            first = db.session.query(MeetingChange.seq).filter_by(meeting_id=meeting_id, seq=since + 1).scalar()
+            if behind > current_app.config['CHANGELOG_MAX_DELTA'] or first is None:
+                meeting = Meeting.query.get_or_404(meeting_id)
+                guests = db.session.query(
+                    guest_participation.c.user_id, guest_participation.c.color
+                ).filter_by(meeting_id=meeting_id).all()
+                snapshot = meeting.serialize()
+                snapshot['guests'] = [{'user_id': guest.user_id, 'color': guest.color} for guest in guests]
+                return jsonify({
+                    'meeting_id': meeting_id,
+                    'version': meeting.version,
+                    'mode': 'snapshot',
+                    'meeting': snapshot
+                }), 200
+
+            # Solo se envía el último cambio de cada timeslot o invitado
+            latest = {}
+            for change in MeetingChange.query.filter(
+                MeetingChange.meeting_id == meeting_id, MeetingChange.seq > since
+            ).order_by(MeetingChange.seq):
+                entity = ('guest', change.user_id) if change.kind == 'guest' else ('timeslot', change.timeslot_id)
+                latest.pop(entity, None)
+                latest[entity] = change
+                version = max(version, change.seq)
+            changes = [change.serialize() for change in latest.values()]
+
+        return jsonify({
+            'meeting_id': meeting_id,
+            'version': version,
+            'mode': 'delta',
+            'changes': changes
+        }), 200
+
+    except SQLAlchemyError as e:
+        abort(500, f'Error retrieving meeting changes: {str(e)}')
 
 @meetings_bp.route('/meetings/<int:meeting_id>/add_guest', methods=['POST'])
+@idempotent
 def add_guest_to_meeting(meeting_id):
     data = request.json
     if not data:
@@ -143,6 +263,10 @@ def add_guest_to_meeting(meeting_id):
 
         # Actualizar conteos de participantes
         meeting.total_guests += 1
+        MeetingService.record_change(meeting_id, 'guest', user_id=new_user.id, color=color)
+
+        # Encolar la invitación en el outbox (misma transacción); el envío lo hace el despachador
+        enqueue_invitation(meeting, new_user, build_invite_link(meeting.id, meeting.password_hash))
         db.session.commit()
 
         return jsonify({
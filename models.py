@@ -1,5 +1,8 @@
+import json
+import zlib
+from collections import namedtuple
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from datetime import datetime, date
 from utils import generate_random_color, generate_meeting_hash
 from sqlalchemy import Integer, CheckConstraint
 
@@ -69,10 +72,15 @@ class Meeting(db.Model):
 
     total_guests = db.Column(db.Integer, default=0)
     confirmed_guests = db.Column(db.Integer, default=0)
+    # Se incrementa con cada cambio de disponibilidad o de invitados (sirve para invalidar cachés)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Fecha en que sus timeslots se movieron a timeslot_archive (None si siguen en la tabla timeslot)
+    archived_at = db.Column(db.DateTime, nullable=True)
 
     # Relación con otros modelos
     timeslots = db.relationship('Timeslot', backref='meeting', lazy='joined')
     final_date = db.relationship('FinalDate', backref='meeting', uselist=False, lazy='joined')
+    archive = db.relationship('TimeslotArchive', uselist=False, lazy='select', cascade='all, delete-orphan')
 
     def __init__(self, title, description, creator_id, password_hash):
         self.title = title
@@ -87,13 +95,20 @@ class Meeting(db.Model):
             'description': self.description,
             'creator_id': self.creator_id,
             'created_at': self.created_at.isoformat(),
-            'timeslots': [t.serialize() for t in self.timeslots],
+            'timeslots': self.serialize_timeslots(),
             'final_date': self.final_date.serialize() if self.final_date else None,
             'password_hash': self.password_hash,
             'total_guests': self.total_guests,
-            'confirmed_guests': self.confirmed_guests
+            'confirmed_guests': self.confirmed_guests,
+            'version': self.version
         }
 
+    def serialize_timeslots(self):
+        # Las reuniones archivadas se hidratan desde su archivo comprimido
+        if self.archived_at and self.archive:
+            return [t.serialize() for t in self.archive.rows()]
+        return [t.serialize() for t in self.timeslots]
+
 class Timeslot(db.Model):
     __tablename__ = 'timeslot'
 
@@ -107,6 +122,8 @@ class Timeslot(db.Model):
         # Agregar una restricción para validar los valores permitidos
     __table_args__ = (
         CheckConstraint('block in (1, 2, 3)', name='check_block_valid'),
+        # Índice para buscar la disponibilidad de un usuario entre reuniones por rango de fechas
+        db.Index('ix_timeslot_user_date_block', 'user_id', 'date', 'block'),
     )
 
     def serialize(self):
@@ -125,12 +142,147 @@ class FinalDate(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     meeting_id = db.Column(db.Integer, db.ForeignKey('meeting.id'), nullable=False)
     date = db.Column(db.Date, nullable=False)
+    block = db.Column(Integer, nullable=True)  # Nulo cuando la fecha final ocupa el día completo
     confirmed_participants = db.Column(db.Integer, default=0)
 
+    __table_args__ = (
+        db.Index('ix_final_date_meeting_id', 'meeting_id'),
+    )
+
     def serialize(self):
         return {
             'id': self.id,
             'meeting_id': self.meeting_id,
             'date': self.date.isoformat(),
+            'block': self.block,
             'confirmed_participants': self.confirmed_participants
         }
+
+class EmailOutbox(db.Model):
+    __tablename__ = 'email_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    meeting_id = db.Column(db.Integer, db.ForeignKey('meeting.id'), nullable=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    # Estados posibles: pending, sending, sent, failed
+    status = db.Column(db.String(10), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    claimed_by = db.Column(db.String(50), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    # Índice para que el despachador encuentre rápido los mensajes pendientes
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'meeting_id': self.meeting_id,
+            'recipient': self.recipient,
+            'subject': self.subject,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat(),
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat(),
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
+
+class IdempotencyRecord(db.Model):
+    __tablename__ = 'idempotency_record'
+
+    # Hash de método, ruta e Idempotency-Key
+    scope = db.Column(db.String(64), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    # 0 mientras la primera petición con la clave se está ejecutando
+    status_code = db.Column(db.Integer, nullable=False)
+    response_body = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class MeetingChange(db.Model):
+    __tablename__ = 'meeting_change'
+
+    id = db.Column(db.Integer, primary_key=True)
+    meeting_id = db.Column(db.Integer, db.ForeignKey('meeting.id'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)  # Versión de la reunión tras el cambio
+    # Tipos posibles: timeslot, timeslot_deleted, guest
+    kind = db.Column(db.String(20), nullable=False)
+    timeslot_id = db.Column(db.Integer, nullable=True)
+    user_id = db.Column(db.Integer, nullable=True)
+    date = db.Column(db.Date, nullable=True)
+    block = db.Column(Integer, nullable=True)
+    available = db.Column(db.Boolean, nullable=True)
+    color = db.Column(db.String(7), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('meeting_id', 'seq', name='uq_meeting_change_meeting_seq'),
+    )
+
+    def serialize(self):
+        change = {'seq': self.seq, 'kind': self.kind}
+        if self.kind == 'guest':
+            change.update({'user_id': self.user_id, 'color': self.color})
+        elif self.kind == 'timeslot_deleted':
+            change.update({'id': self.timeslot_id})
+        else:
+            change.update({
+                'id': self.timeslot_id,
+                'user_id': self.user_id,
+                'date': self.date.isoformat(),
+                'block': self.block,
+                'available': self.available
+            })
+        return change
+
+class ArchivedTimeslot(namedtuple('ArchivedTimeslot', ['id', 'meeting_id', 'user_id', 'date', 'block', 'available'])):
+    """Timeslot de solo lectura hidratado desde timeslot_archive (mismos atributos que Timeslot)."""
+    __slots__ = ()
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'meeting_id': self.meeting_id,
+            'user_id': self.user_id,
+            'date': self.date.isoformat(),
+            'block': self.block,
+            'available': self.available
+        }
+
+class TimeslotArchive(db.Model):
+    __tablename__ = 'timeslot_archive'
+
+    meeting_id = db.Column(db.Integer, db.ForeignKey('meeting.id'), primary_key=True)
+    # JSON columnar comprimido con zlib (fechas como ordinales)
+    payload = db.Column(db.LargeBinary, nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    available_count = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    @staticmethod
+    def pack(timeslots):
+        """Comprime una lista de timeslots en el formato columnar del archivo."""
+        columns = {'id': [], 'user_id': [], 'date': [], 'block': [], 'available': []}
+        for t in timeslots:
+            columns['id'].append(t.id)
+            columns['user_id'].append(t.user_id)
+            columns['date'].append(t.date.toordinal())
+            columns['block'].append(t.block)
+            columns['available'].append(1 if t.available else 0)
+        return zlib.compress(json.dumps(columns, separators=(',', ':')).encode(), 9)
+
+    def rows(self):
+        columns = json.loads(zlib.decompress(self.payload))
+        return [
+            ArchivedTimeslot(id_, self.meeting_id, user_id, date.fromordinal(ordinal), block, bool(available))
+            for id_, user_id, ordinal, block, available in zip(
+                columns['id'], columns['user_id'], columns['date'], columns['block'], columns['available']
+            )
+        ]
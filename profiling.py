@@ -0,0 +1,154 @@
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import random
+import re
+import threading
+from datetime import datetime
+from flask import Blueprint, current_app, g, request, abort, jsonify, send_from_directory
+from utils import get_request_meeting_id
+
+profiling_bp = Blueprint('profiling', __name__)
+
+# cProfile solo admite un perfilador activo a la vez; las peticiones concurrentes no se perfilan
+_profiler_lock = threading.Lock()
+
+PROFILE_NAME_RE = re.compile(r'^(?P<timestamp>\d{8}T\d{6}_\d{6})_(?P<endpoint>[\w.]+)_m(?P<meeting_id>\d+|none)\.prof$')
+
+
+def init_profiling(app):
+    """
+    Registra los hooks de perfilado por petición.
+    Si PROFILING_ENABLED es False no se registra nada, por lo que el costo es cero.
+    """
+    if not app.config['PROFILING_ENABLED']:
+        return
+
+    os.makedirs(app.config['PROFILING_DIR'], exist_ok=True)
+    app.before_request(start_request_profile)
+    app.after_request(tag_profiled_response)
+    app.teardown_request(finish_request_profile)
+    app.register_blueprint(profiling_bp)
+
+
+def is_admin_request():
+    token = current_app.config['PROFILING_ADMIN_TOKEN']
+    header = request.headers.get('X-Profile-Token', '')
+    # Se comparan bytes: compare_digest no admite strings con caracteres no ASCII
+    return bool(token) and hmac.compare_digest(header.encode(), token.encode())
+
+
+def should_profile():
+    """Se perfila si un administrador lo pide por header o si la petición cae en el muestreo."""
+    if request.endpoint is None or request.endpoint.startswith('profiling.'):
+        return False
+    if request.headers.get('X-Profile') and is_admin_request():
+        return True
+    sample_rate = current_app.config['PROFILING_SAMPLE_RATE']
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def start_request_profile():
+    if not should_profile() or not _profiler_lock.acquire(blocking=False):
+        return
+
+    meeting_id = get_request_meeting_id()
+    g.profile_name = '{}_{}_m{}.prof'.format(
+        datetime.utcnow().strftime('%Y%m%dT%H%M%S_%f'),
+        request.endpoint,
+        meeting_id if meeting_id is not None else 'none'
+    )
+    g.profiler = cProfile.Profile()
+    g.profiler.enable()
+
+
+def tag_profiled_response(response):
+    if 'profile_name' in g:
+        response.headers['X-Profile-Id'] = g.profile_name
+    return response
+
+
+def finish_request_profile(exc=None):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return
+
+    try:
+        profiler.disable()
+    finally:
+        _profiler_lock.release()
+
+    profile_dir = current_app.config['PROFILING_DIR']
+    profiler.dump_stats(os.path.join(profile_dir, g.pop('profile_name')))
+    rotate_profiles(profile_dir, current_app.config['PROFILING_MAX_FILES'])
+
+
+def rotate_profiles(profile_dir, max_files):
+    """Elimina los perfiles más antiguos para mantener como máximo max_files en el directorio."""
+    names = sorted(name for name in os.listdir(profile_dir) if PROFILE_NAME_RE.match(name))
+    for name in names[:max(len(names) - max_files, 0)]:
+        try:
+            os.remove(os.path.join(profile_dir, name))
+        except FileNotFoundError:
+            pass
+
+
+@profiling_bp.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    if not is_admin_request():
+        abort(403, 'Admin token required')
+
+    endpoint = request.args.get('endpoint')
+    meeting_id = request.args.get('meeting_id')
+    profile_dir = current_app.config['PROFILING_DIR']
+
+    profiles = []
+    for name in sorted(os.listdir(profile_dir), reverse=True):
+        match = PROFILE_NAME_RE.match(name)
+        if not match:
+            continue
+        if endpoint and match['endpoint'] != endpoint:
+            continue
+        if meeting_id and match['meeting_id'] != meeting_id:
+            continue
+        profiles.append({
+            'name': name,
+            'endpoint': match['endpoint'],
+            'meeting_id': int(match['meeting_id']) if match['meeting_id'] != 'none' else None,
+            'created_at': datetime.strptime(match['timestamp'], '%Y%m%dT%H%M%S_%f').isoformat(),
+            'size': os.path.getsize(os.path.join(profile_dir, name))
+        })
+
+    return jsonify(profiles), 200
+
+
+@profiling_bp.route('/admin/profiles/<name>', methods=['GET'])
+def get_profile(name):
+    if not is_admin_request():
+        abort(403, 'Admin token required')
+    if not PROFILE_NAME_RE.match(name):
+        abort(404, 'Profile not found')
+
+    profile_dir = current_app.config['PROFILING_DIR']
+    if request.args.get('raw'):
+        return send_from_directory(profile_dir, name, as_attachment=True)
+
+    try:
+        limit = int(request.args.get('limit', 30))
+    except ValueError:
+        abort(400, 'Invalid limit')
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in ('cumulative', 'tottime', 'calls'):
+        abort(400, 'Invalid sort. Must be cumulative, tottime or calls.')
+
+    path = os.path.join(profile_dir, name)
+    if not os.path.exists(path):
+        abort(404, 'Profile not found')
+
+    output = io.StringIO()
+    stats = pstats.Stats(path, stream=output)
+    stats.sort_stats(sort).print_stats(limit)
+
+    return jsonify({'name': name, 'total_time': stats.total_tt, 'stats': output.getvalue()}), 200
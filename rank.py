@@ -1,28 +1,65 @@
-from models import Timeslot, db  # Importa desde models
+from models import FinalDate, guest_participation, db  # Importa desde models
+from archive import load_timeslots
 
-def calculate_rankings(meeting_id):
+def get_booked_slots(meeting_id, user_ids):
+    """
+    Obtiene los bloques en que los usuarios ya están comprometidos por la fecha final de otra reunión.
+
+    :return: Un set de tuplas (user_id, fecha, bloque); el bloque es None si la fecha final ocupa el día completo.
+    """
+    if not user_ids:
+        return set()
+
+    rows = db.session.query(guest_participation.c.user_id, FinalDate.date, FinalDate.block).join(
+        FinalDate, FinalDate.meeting_id == guest_participation.c.meeting_id
+    ).filter(
+        FinalDate.meeting_id != meeting_id,
+        guest_participation.c.user_id.in_(user_ids)
+    ).all()
+
+    return {(row.user_id, row.date, row.block) for row in rows}
+
+def calculate_rankings(meeting_id, discount_booked=False):
     """
     Calcula el ranking de los slots basándose en las coincidencias.
+
+    :param discount_booked: Si es True, no se cuenta la disponibilidad de participantes que ya
+        tienen ese bloque ocupado por la fecha final de otra reunión.
+    """
+    # Obtener todos los timeslots para la reunión (incluso si está archivada)
+    timeslots = load_timeslots(meeting_id)
+
+    booked = set()
+    if discount_booked:
+        booked = get_booked_slots(meeting_id, {slot.user_id for slot in timeslots if slot.available})
+
+    return rank_slots(timeslots, booked)
+
+def rank_slots(timeslots, booked=frozenset(), limit=3):
+    """
+    Ordena los slots (fecha, bloque) por cantidad de participantes disponibles.
+    Recibe cualquier secuencia con atributos user_id, date, block y available.
+
+    :param booked: Set de tuplas (user_id, fecha, bloque) que no se cuentan como disponibles.
     """
-    # Obtener todos los timeslots para la reunión
-    timeslots = Timeslot.query.filter_by(meeting_id=meeting_id).all()
-    
     # Inicializar un diccionario para contar coincidencias
     slot_counts = {}
-    
+
     # Contar las coincidencias para cada slot
     for slot in timeslots:
-        key = (slot.day, slot.block)
+        key = (slot.date, slot.block)
         if key not in slot_counts:
             slot_counts[key] = 0
-        if slot.available:
-            slot_counts[key] += 1
-    
+        if not slot.available:
+            continue
+        if (slot.user_id, slot.date, slot.block) in booked or (slot.user_id, slot.date, None) in booked:
+            continue
+        slot_counts[key] += 1
+
     # Ordenar los slots por el número de coincidencias, de mayor a menor
     sorted_slots = sorted(slot_counts.items(), key=lambda x: x[1], reverse=True)
-    
-    # Crear un ranking con los 3 mejores slots
-    rankings = [{'day': day, 'block': block, 'count': count} for (day, block), count in sorted_slots[:3]]
-    
-    return rankings
 
+    # Crear un ranking con los mejores slots
+    rankings = [{'date': date.isoformat(), 'block': block, 'count': count} for (date, block), count in sorted_slots[:limit]]
+
+    return rankings
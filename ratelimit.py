@@ -0,0 +1,151 @@
+import math
+import threading
+import time
+from flask import current_app, g, request
+from werkzeug.exceptions import TooManyRequests, ServiceUnavailable
+from utils import get_request_meeting_id
+
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class MemoryStore:
+    """
+    Token buckets en memoria del proceso. Cada bucket guarda (tokens, último instante).
+    """
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, burst):
+        """
+        Intenta consumir un token. Retorna (permitido, segundos hasta el próximo token).
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                allowed, retry_after = True, 0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (1 - tokens) / rate
+
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now):
+        # Un bucket inactivo por más de un minuto ya está lleno: se puede olvidar sin cambiar el resultado
+        stale = [key for key, (_, last) in self._buckets.items() if now - last > 60]
+        for key in stale:
+            del self._buckets[key]
+
+
+class RedisStore:
+    """
+    Token buckets compartidos entre procesos en Redis (requiere el paquete redis).
+    """
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or burst
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    else
+        retry_after = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return {allowed, tostring(retry_after)}
+    """
+
+    def __init__(self, uri):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RATELIMIT_STORAGE_URI uses redis:// but the redis package is not installed')
+        self._client = redis.Redis.from_url(uri)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def consume(self, key, rate, burst):
+        allowed, retry_after = self._script(keys=[f'ratelimit:{key}'], args=[rate, burst, time.time()])
+        return bool(allowed), float(retry_after)
+
+
+def create_store(uri):
+    if uri.startswith('memory://'):
+        return MemoryStore()
+    if uri.startswith(('redis://', 'rediss://')):
+        return RedisStore(uri)
+    raise ValueError(f'Unsupported RATELIMIT_STORAGE_URI: {uri}')
+
+
+def init_rate_limiting(app):
+    """
+    Registra el control de admisión: límites de token bucket por endpoint (o blueprint) y un
+    tope global de peticiones de escritura concurrentes, para que la espera ocurra en la app
+    y no en los bloqueos de la base de datos.
+    """
+    if app.config['RATELIMIT_ENABLED']:
+        app.extensions['ratelimit_store'] = create_store(app.config['RATELIMIT_STORAGE_URI'])
+        app.before_request(check_rate_limits)
+
+    if app.config['WRITE_CONCURRENCY_LIMIT']:
+        app.extensions['write_semaphore'] = threading.BoundedSemaphore(app.config['WRITE_CONCURRENCY_LIMIT'])
+        app.before_request(acquire_write_slot)
+        app.teardown_request(release_write_slot)
+
+
+def get_limit_key(kind):
+    """Obtiene el valor que identifica al bucket según su tipo: meeting, invite o client."""
+    if kind == 'meeting':
+        return get_request_meeting_id()
+    if kind == 'invite':
+        return request.args.get('hash') or request.headers.get('X-Invite-Hash')
+    if kind == 'client':
+        return request.remote_addr
+    raise ValueError(f'Unknown rate limit key: {kind}')
+
+
+def check_rate_limits():
+    if request.endpoint is None:
+        return
+
+    limits = current_app.config['RATELIMIT_LIMITS']
+    endpoint_limits = limits.get(request.endpoint) or limits.get(request.blueprint) or {}
+    store = current_app.extensions['ratelimit_store']
+
+    for kind, (rate, burst) in endpoint_limits.items():
+        value = get_limit_key(kind)
+        if value is None:
+            continue
+        allowed, retry_after = store.consume(f'{request.endpoint}:{kind}:{value}', rate, burst)
+        if not allowed:
+            raise TooManyRequests(
+                f'Rate limit exceeded for this {kind}. Try again later.',
+                retry_after=max(1, math.ceil(retry_after))
+            )
+
+
+def acquire_write_slot():
+    if request.method not in WRITE_METHODS:
+        return
+
+    semaphore = current_app.extensions['write_semaphore']
+    if not semaphore.acquire(timeout=current_app.config['WRITE_QUEUE_TIMEOUT']):
+        raise ServiceUnavailable('Too many concurrent write requests. Try again later.', retry_after=1)
+    g.write_slot = True
+
+
+def release_write_slot(exc=None):
+    if g.pop('write_slot', False):
+        current_app.extensions['write_semaphore'].release()
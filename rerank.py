@@ -0,0 +1,174 @@
+import multiprocessing
+import time
+from sqlalchemy import create_engine, select, update, func, bindparam, Integer
+from models import Meeting, Timeslot, FinalDate, TimeslotArchive, guest_participation
+from rank import rank_slots
+
+meeting_table = Meeting.__table__
+timeslot_table = Timeslot.__table__
+final_date_table = FinalDate.__table__
+archive_table = TimeslotArchive.__table__
+
+# Máximo de discrepancias que cada partición devuelve en detalle
+MAX_REPORTED_DISCREPANCIES = 50
+
+
+def partition(meeting_ids, chunk_size):
+    return [meeting_ids[i:i + chunk_size] for i in range(0, len(meeting_ids), chunk_size)]
+
+
+def final_slot_count(timeslots, final_date, final_block):
+    """
+    Disponibles en el slot de la fecha final. Si el bloque es None (día completo) se usa el mejor
+    bloque de ese día, para comparar con el mismo tipo de conteo que el ranking.
+    """
+    counts = {}
+    for slot in timeslots:
+        if slot.available and slot.date == final_date and final_block in (None, slot.block):
+            counts[slot.block] = counts.get(slot.block, 0) + 1
+    return max(counts.values(), default=0)
+
+
+def create_worker_engine(database_uri):
+    # Cada proceso usa su propio engine; SQLite necesita esperar el lock de escritura de los demás
+    connect_args = {'timeout': 60} if database_uri.startswith('sqlite') else {}
+    return create_engine(database_uri, connect_args=connect_args)
+
+
+def rerank_partition(task):
+    """
+    Recalcula conteos de invitados, rankings y fecha final candidata de una partición de reuniones.
+    Se ejecuta en un proceso del pool con su propio engine.
+
+    :param task: Tupla (database_uri, meeting_ids, batch_size, dry_run).
+    :return: Diccionario con estadísticas y discrepancias encontradas.
+    """
+    database_uri, meeting_ids, batch_size, dry_run = task
+    started = time.monotonic()
+    engine = create_worker_engine(database_uri)
+    stats = {'meetings': len(meeting_ids), 'timeslots': 0, 'updated': 0, 'discrepancies': 0, 'details': []}
+
+    try:
+        with engine.connect() as conn:
+            current = {row.id: row for row in conn.execute(
+                select(meeting_table.c.id, meeting_table.c.total_guests, meeting_table.c.confirmed_guests)
+                .where(meeting_table.c.id.in_(meeting_ids))
+            )}
+            counts = {row.meeting_id: row for row in conn.execute(
+                select(
+                    guest_participation.c.meeting_id,
+                    func.count().label('total'),
+                    func.coalesce(func.sum(guest_participation.c.confirmed.cast(Integer)), 0).label('confirmed')
+                ).where(guest_participation.c.meeting_id.in_(meeting_ids))
+                .group_by(guest_participation.c.meeting_id)
+            )}
+            finals = {row.meeting_id: (row.date, row.block) for row in conn.execute(
+                select(final_date_table.c.meeting_id, final_date_table.c.date, final_date_table.c.block)
+                .where(final_date_table.c.meeting_id.in_(meeting_ids))
+            )}
+
+            # Rankings a partir de lecturas en streaming, agrupadas por reunión
+            candidates = {}
+            final_counts = {}
+            rows = conn.execution_options(stream_results=True, yield_per=2000).execute(
+                select(timeslot_table.c.meeting_id, timeslot_table.c.user_id, timeslot_table.c.date,
+                       timeslot_table.c.block, timeslot_table.c.available)
+                .where(timeslot_table.c.meeting_id.in_(meeting_ids))
+                .order_by(timeslot_table.c.meeting_id)
+            )
+            group, group_id = [], None
+            for row in rows:
+                if row.meeting_id != group_id and group:
+                    candidates[group_id] = rank_slots(group)
+                    if group_id in finals:
+                        final_counts[group_id] = final_slot_count(group, *finals[group_id])
+                    group = []
+                group_id = row.meeting_id
+                group.append(row)
+                stats['timeslots'] += 1
+            if group:
+                candidates[group_id] = rank_slots(group)
+                if group_id in finals:
+                    final_counts[group_id] = final_slot_count(group, *finals[group_id])
+
+            # Reuniones archivadas: se hidratan desde su archivo
+            for row in conn.execute(
+                select(archive_table.c.meeting_id, archive_table.c.payload)
+                .where(archive_table.c.meeting_id.in_(meeting_ids))
+            ):
+                archived = TimeslotArchive(meeting_id=row.meeting_id, payload=row.payload).rows()
+                candidates[row.meeting_id] = rank_slots(archived)
+                if row.meeting_id in finals:
+                    final_counts[row.meeting_id] = final_slot_count(archived, *finals[row.meeting_id])
+                stats['timeslots'] += len(archived)
+
+        updates = []
+        for meeting_id in meeting_ids:
+            if meeting_id not in current:
+                continue
+            meeting = current[meeting_id]
+            total = counts[meeting_id].total if meeting_id in counts else 0
+            confirmed = counts[meeting_id].confirmed if meeting_id in counts else 0
+            ranking = candidates.get(meeting_id, [])
+
+            problems = []
+            if (meeting.total_guests or 0) != total or (meeting.confirmed_guests or 0) != confirmed:
+                problems.append(
+                    f'guest counts {meeting.total_guests}/{meeting.confirmed_guests} should be {total}/{confirmed}'
+                )
+                updates.append({'b_id': meeting_id, 'b_total': total, 'b_confirmed': confirmed})
+            if meeting_id in finals and ranking:
+                final_date, final_block = finals[meeting_id]
+                best = ranking[0]
+                # Solo es discrepancia si la fecha final tiene menos disponibles que la mejor candidata:
+                # los empates se ordenan de forma arbitraria en el ranking
+                final_count = final_counts.get(meeting_id, 0)
+                if final_count < best['count']:
+                    problems.append(
+                        f'final date {final_date.isoformat()} block {final_block} has {final_count} available, '
+                        f'best candidate {best["date"]} block {best["block"]} has {best["count"]}'
+                    )
+
+            if problems:
+                stats['discrepancies'] += 1
+                if len(stats['details']) < MAX_REPORTED_DISCREPANCIES:
+                    stats['details'].append({'meeting_id': meeting_id, 'problems': problems, 'ranking': ranking})
+
+        # Escrituras en transacciones por lotes
+        if not dry_run and updates:
+            statement = update(meeting_table).where(meeting_table.c.id == bindparam('b_id')).values(
+                total_guests=bindparam('b_total'), confirmed_guests=bindparam('b_confirmed')
+            )
+            for batch in partition(updates, batch_size):
+                with engine.begin() as conn:
+                    conn.execute(statement, batch)
+                stats['updated'] += len(batch)
+    finally:
+        engine.dispose()
+
+    stats['elapsed'] = time.monotonic() - started
+    return stats
+
+
+def rerank_all(database_uri, meeting_ids, workers=4, chunk_size=500, batch_size=200, dry_run=False, progress=None):
+    """
+    Reparte las reuniones en particiones entre un pool de procesos y acumula los resultados.
+
+    :param progress: Función opcional que recibe los totales acumulados tras cada partición.
+    """
+    started = time.monotonic()
+    totals = {'meetings': 0, 'timeslots': 0, 'updated': 0, 'discrepancies': 0, 'details': []}
+    tasks = [(database_uri, chunk, batch_size, dry_run) for chunk in partition(meeting_ids, chunk_size)]
+
+    # spawn: los procesos no heredan conexiones ni hilos del proceso principal
+    with multiprocessing.get_context('spawn').Pool(processes=workers) as pool:
+        for stats in pool.imap_unordered(rerank_partition, tasks):
+            for key in ('meetings', 'timeslots', 'updated', 'discrepancies'):
+                totals[key] += stats[key]
+            totals['details'].extend(stats['details'])
+            totals['elapsed'] = time.monotonic() - started
+            if progress:
+                progress(totals)
+
+    totals['elapsed'] = time.monotonic() - started
+    return totals
@@ -0,0 +1,180 @@
+"""
+Serializadores que escriben JSON directamente desde filas de SQLAlchemy Core, sin construir
+diccionarios intermedios. Producen el mismo contenido que los métodos serialize() de los modelos.
+"""
+import json
+from functools import lru_cache
+from models import db, User, Role, Meeting, Timeslot, FinalDate, TimeslotArchive, user_roles
+
+
+@lru_cache(maxsize=4096)
+def iso_date(value):
+    # Las reuniones repiten pocas fechas en miles de timeslots: se convierten una sola vez
+    return '"' + value.isoformat() + '"'
+
+
+def json_int(value):
+    return 'null' if value is None else str(int(value))
+
+
+def json_bool(value):
+    return 'null' if value is None else ('true' if value else 'false')
+
+
+def json_str(value):
+    return 'null' if value is None else json.dumps(value)
+
+
+def json_date(value):
+    return 'null' if value is None else iso_date(value)
+
+
+def json_datetime(value):
+    return 'null' if value is None else '"' + value.isoformat() + '"'
+
+
+def json_str_list(values):
+    return '[' + ','.join(json.dumps(value) for value in values) + ']'
+
+
+def compile_row_serializer(fields):
+    """
+    Precompila un serializador para filas cuyas columnas vienen en el orden de fields.
+
+    :param fields: Lista de tuplas (clave JSON, función de conversión).
+    :return: Una función que recibe una fila (tupla) y retorna el objeto JSON como texto.
+    """
+    render = ('{{' + ','.join(json.dumps(key) + ':{}' for key, _ in fields) + '}}').format
+    converters = tuple(convert for _, convert in fields)
+
+    def serialize(row):
+        return render(*[convert(value) for convert, value in zip(converters, row)])
+
+    return serialize
+
+
+# Los roles se insertan como lista de nombres
+USER_FIELDS = [
+    ('id', json_int),
+    ('name', json_str),
+    ('email', json_str),
+    ('roles', json_str_list),
+]
+USER_COLUMNS = (User.id, User.name, User.email)
+
+TIMESLOT_FIELDS = [
+    ('id', json_int),
+    ('meeting_id', json_int),
+    ('user_id', json_int),
+    ('date', json_date),
+    ('block', json_int),
+    ('available', json_bool),
+]
+TIMESLOT_COLUMNS = (Timeslot.id, Timeslot.meeting_id, Timeslot.user_id, Timeslot.date, Timeslot.block, Timeslot.available)
+
+FINAL_DATE_FIELDS = [
+    ('id', json_int),
+    ('meeting_id', json_int),
+    ('date', json_date),
+    ('block', json_int),
+    ('confirmed_participants', json_int),
+]
+FINAL_DATE_COLUMNS = (FinalDate.id, FinalDate.meeting_id, FinalDate.date, FinalDate.block, FinalDate.confirmed_participants)
+
+# Los timeslots y la fecha final se insertan ya serializados
+MEETING_FIELDS = [
+    ('id', json_int),
+    ('title', json_str),
+    ('description', json_str),
+    ('creator_id', json_int),
+    ('created_at', json_datetime),
+    ('timeslots', str),
+    ('final_date', str),
+    ('password_hash', json_str),
+    ('total_guests', json_int),
+    ('confirmed_guests', json_int),
+    ('version', json_int),
+]
+MEETING_COLUMNS = (
+    Meeting.id, Meeting.title, Meeting.description, Meeting.creator_id, Meeting.created_at,
+    Meeting.password_hash, Meeting.total_guests, Meeting.confirmed_guests, Meeting.version, Meeting.archived_at
+)
+
+serialize_user_row = compile_row_serializer(USER_FIELDS)
+serialize_timeslot_row = compile_row_serializer(TIMESLOT_FIELDS)
+serialize_final_date_row = compile_row_serializer(FINAL_DATE_FIELDS)
+serialize_meeting_row = compile_row_serializer(MEETING_FIELDS)
+
+
+def meetings_json(meeting_ids=None):
+    """
+    Serializa reuniones (todas, o las de meeting_ids) con tres consultas Core en total.
+
+    :return: Una lista con el JSON de cada reunión, en orden de id.
+    """
+    meetings_query = db.select(*MEETING_COLUMNS).order_by(Meeting.id)
+    timeslots_query = db.select(*TIMESLOT_COLUMNS).order_by(Timeslot.meeting_id, Timeslot.id)
+    final_dates_query = db.select(*FINAL_DATE_COLUMNS).order_by(FinalDate.id.desc())
+    if meeting_ids is not None:
+        meetings_query = meetings_query.where(Meeting.id.in_(meeting_ids))
+        timeslots_query = timeslots_query.where(Timeslot.meeting_id.in_(meeting_ids))
+        final_dates_query = final_dates_query.where(FinalDate.meeting_id.in_(meeting_ids))
+
+    meetings = db.session.execute(meetings_query).all()
+    if not meetings:
+        return []
+
+    timeslots = {}
+    for row in db.session.execute(timeslots_query):
+        timeslots.setdefault(row[1], []).append(serialize_timeslot_row(row))
+
+    # Orden descendente: si hay varias fechas finales queda la de menor id, como en la relación del modelo
+    final_dates = {row[1]: serialize_final_date_row(row) for row in db.session.execute(final_dates_query)}
+
+    # Reuniones archivadas: sus timeslots se hidratan desde el archivo
+    archived_ids = [row.id for row in meetings if row.archived_at]
+    if archived_ids:
+        for archive in TimeslotArchive.query.filter(TimeslotArchive.meeting_id.in_(archived_ids)):
+            timeslots[archive.meeting_id] = [serialize_timeslot_row(row) for row in archive.rows()]
+
+    return [
+        serialize_meeting_row((
+            row.id, row.title, row.description, row.creator_id, row.created_at,
+            '[' + ','.join(timeslots.get(row.id, ())) + ']',
+            final_dates.get(row.id, 'null'),
+            row.password_hash, row.total_guests, row.confirmed_guests, row.version
+        ))
+        for row in meetings
+    ]
+
+
+def meeting_json(meeting_id):
+    """Serializa una reunión, o retorna None si no existe."""
+    result = meetings_json([meeting_id])
+    return result[0] if result else None
+
+
+def users_json(user_ids):
+    """
+    Serializa usuarios con sus roles en dos consultas Core.
+
+    :return: Una lista con el JSON de cada usuario, en orden de id.
+    """
+    users = db.session.execute(db.select(*USER_COLUMNS).where(User.id.in_(user_ids)).order_by(User.id)).all()
+    if not users:
+        return []
+
+    roles = {}
+    for user_id, role_name in db.session.execute(
+        db.select(user_roles.c.user_id, Role.name).join(Role, Role.id == user_roles.c.role_id)
+        .where(user_roles.c.user_id.in_(user_ids))
+    ):
+        roles.setdefault(user_id, []).append(role_name)
+
+    return [serialize_user_row((row.id, row.name, row.email, roles.get(row.id, ()))) for row in users]
+
+
+def user_json(user_id):
+    """Serializa un usuario, o retorna None si no existe."""
+    result = users_json([user_id])
+    return result[0] if result else None
@@ -0,0 +1,251 @@
+import random
+import time
+from models import db, Timeslot, FinalDate, TimeslotArchive, guest_participation
+
+
+class SeriesProblem:
+    """
+    Disponibilidad combinada de una serie de reuniones que comparten participantes.
+
+    Para cada reunión se calculan los slots candidatos (fecha, bloque) con el conjunto de
+    participantes que asistirían, representado como bitmap sobre un índice global de usuarios.
+    """
+    def __init__(self, meeting_ids):
+        self.meeting_ids = list(dict.fromkeys(meeting_ids))
+        self.user_index = {}
+        self.candidates = {}   # meeting_id -> [((fecha, bloque), bitmap, asistentes)], de mayor a menor
+        self.fixed = {}        # meeting_id -> ((fecha, bloque), bitmap, asistentes) de reuniones ya finalizadas
+        self.load()
+
+    def user_bit(self, user_id):
+        if user_id not in self.user_index:
+            self.user_index[user_id] = len(self.user_index)
+        return 1 << self.user_index[user_id]
+
+    def load(self):
+        ids = self.meeting_ids
+
+        # Disponibilidad de todas las reuniones en una sola consulta (más las archivadas)
+        availability = {meeting_id: {} for meeting_id in ids}
+        rows = db.session.query(Timeslot.meeting_id, Timeslot.user_id, Timeslot.date, Timeslot.block).filter(
+            Timeslot.meeting_id.in_(ids), Timeslot.available.is_(True)
+        ).all()
+        for archive in TimeslotArchive.query.filter(TimeslotArchive.meeting_id.in_(ids)):
+            rows += [(t.meeting_id, t.user_id, t.date, t.block) for t in archive.rows() if t.available]
+        for meeting_id, user_id, date, block in rows:
+            availability[meeting_id].setdefault((date, block), set()).add(user_id)
+
+        # Bloques ya comprometidos por fechas finales de reuniones fuera de la serie
+        user_ids = {user_id for _, user_id, _, _ in rows}
+        booked = set()
+        if user_ids:
+            booked = {(row.user_id, row.date, row.block) for row in db.session.query(
+                guest_participation.c.user_id, FinalDate.date, FinalDate.block
+            ).join(FinalDate, FinalDate.meeting_id == guest_participation.c.meeting_id).filter(
+                FinalDate.meeting_id.notin_(ids), guest_participation.c.user_id.in_(user_ids)
+            )}
+
+        finals = {final.meeting_id: final for final in FinalDate.query.filter(FinalDate.meeting_id.in_(ids))}
+
+        # Participantes de las reuniones ya finalizadas: quedan todos comprometidos en su slot,
+        # igual que en booked, aunque no hayan marcado disponibilidad en él
+        members = {}
+        if finals:
+            for row in db.session.query(guest_participation.c.meeting_id, guest_participation.c.user_id).filter(
+                guest_participation.c.meeting_id.in_(list(finals))
+            ):
+                members.setdefault(row.meeting_id, []).append(row.user_id)
+
+        for meeting_id in ids:
+            options = []
+            for (date, block), users in availability[meeting_id].items():
+                # Quien ya está comprometido en otra reunión no cuenta como asistente
+                attendees = [
+                    user_id for user_id in users
+                    if (user_id, date, block) not in booked and (user_id, date, None) not in booked
+                ]
+                mask = 0
+                for user_id in attendees:
+                    mask |= self.user_bit(user_id)
+                options.append(((date, block), mask, len(attendees)))
+
+            if meeting_id in finals:
+                final = finals[meeting_id]
+                slot = (final.date, final.block)
+                match = [option for option in options if option[0] == slot]
+                mask, attendance = (match[0][1], match[0][2]) if match else (0, 0)
+                for user_id in members.get(meeting_id, []):
+                    mask |= self.user_bit(user_id)
+                self.fixed[meeting_id] = (slot, mask, attendance)
+            else:
+                options.sort(key=lambda option: (-option[2], option[0]))
+                self.candidates[meeting_id] = options
+
+
+def slots_overlap(a, b):
+    # Un bloque None representa el día completo
+    return a[0] == b[0] and (a[1] is None or b[1] is None or a[1] == b[1])
+
+
+class SeriesSolver:
+    """
+    Asigna un slot a cada reunión de la serie maximizando la asistencia total sin que ningún
+    participante quede en dos reuniones a la vez.
+
+    Parte de una solución greedy (reuniones más restringidas primero), la mejora con búsqueda
+    local (mover una reunión, o moverla desplazando a la única reunión con la que choca) y usa
+    el tiempo restante en reinicios perturbados, conservando la mejor solución encontrada.
+    """
+    def __init__(self, problem, time_budget=0.5, seed=0):
+        self.problem = problem
+        self.deadline = time.monotonic() + time_budget
+        self.random = random.Random(seed)
+        self.iterations = 0
+
+    def out_of_time(self):
+        return time.monotonic() >= self.deadline
+
+    def option(self, assignment, meeting_id):
+        if meeting_id in self.problem.fixed:
+            return self.problem.fixed[meeting_id]
+        index = assignment.get(meeting_id)
+        return None if index is None else self.problem.candidates[meeting_id][index]
+
+    def conflicts(self, assignment, meeting_id, option):
+        """Reuniones asignadas que comparten un asistente con option en un slot que se superpone."""
+        slot, mask, _ = option
+        clashing = []
+        for other_id in self.problem.meeting_ids:
+            if other_id == meeting_id:
+                continue
+            other = self.option(assignment, other_id)
+            if other is not None and other[1] & mask and slots_overlap(other[0], slot):
+                clashing.append(other_id)
+        return clashing
+
+    def score(self, assignment):
+        assigned = [self.option(assignment, meeting_id) for meeting_id in self.problem.candidates]
+        assigned = [option for option in assigned if option is not None]
+        return sum(option[2] for option in assigned), len(assigned)
+
+    def best_free_option(self, assignment, meeting_id):
+        for index, option in enumerate(self.problem.candidates[meeting_id]):
+            if not self.conflicts(assignment, meeting_id, option):
+                return index
+        return None
+
+    def greedy(self, assignment, order):
+        for meeting_id in order:
+            if assignment.get(meeting_id) is None:
+                assignment[meeting_id] = self.best_free_option(assignment, meeting_id)
+        return assignment
+
+    def improve(self, assignment):
+        """Búsqueda local hasta que ningún movimiento mejore la asistencia total."""
+        improved = True
+        while improved and not self.out_of_time():
+            improved = False
+            for meeting_id, options in self.problem.candidates.items():
+                current = self.option(assignment, meeting_id)
+                current_count = current[2] if current else -1
+                for index, option in enumerate(options):
+                    self.iterations += 1
+                    if option[2] <= current_count:
+                        break  # Las opciones están ordenadas: ninguna de las siguientes es mejor
+                    clashing = self.conflicts(assignment, meeting_id, option)
+                    if not clashing:
+                        assignment[meeting_id] = index
+                        improved = True
+                        break
+                    if len(clashing) != 1 or clashing[0] in self.problem.fixed:
+                        continue
+
+                    # Movimiento de expulsión: reubicar a la única reunión que choca
+                    other_id = clashing[0]
+                    trial = dict(assignment)
+                    trial[meeting_id] = index
+                    trial[other_id] = None
+                    trial[other_id] = self.best_free_option(trial, other_id)
+                    if self.score(trial) > self.score(assignment):
+                        assignment.update(trial)
+                        improved = True
+                        break
+                if improved or self.out_of_time():
+                    break
+        return assignment
+
+    def solve(self):
+        # Primero las reuniones con menos alternativas y mayor asistencia posible
+        order = sorted(
+            self.problem.candidates,
+            key=lambda meeting_id: (
+                len(self.problem.candidates[meeting_id]),
+                -(self.problem.candidates[meeting_id][0][2] if self.problem.candidates[meeting_id] else 0)
+            )
+        )
+        best = self.improve(self.greedy({}, order))
+        best_score = self.score(best)
+
+        # Cota superior: cada reunión en su mejor slot, ignorando los choques
+        upper_bound = (
+            sum(options[0][2] for options in self.problem.candidates.values() if options),
+            sum(1 for options in self.problem.candidates.values() if options)
+        )
+
+        # Reinicios perturbados mientras quede tiempo (o hasta alcanzar la cota)
+        movable = [meeting_id for meeting_id in order if self.problem.candidates[meeting_id]]
+        while movable and best_score < upper_bound and not self.out_of_time():
+            trial = dict(best)
+            for meeting_id in self.random.sample(movable, max(1, len(movable) // 3)):
+                trial[meeting_id] = None
+            shuffled = list(order)
+            self.random.shuffle(shuffled)
+            trial = self.improve(self.greedy(trial, shuffled))
+            trial_score = self.score(trial)
+            if trial_score > best_score:
+                best, best_score = trial, trial_score
+
+        return best
+
+
+def schedule_series(meeting_ids, time_budget=0.5, dry_run=False):
+    """
+    Resuelve la serie y, salvo en dry_run, guarda una FinalDate por cada reunión asignada.
+
+    :return: Un diccionario con las asignaciones, la asistencia total y las estadísticas de la búsqueda.
+    """
+    started = time.monotonic()
+    problem = SeriesProblem(meeting_ids)
+    solver = SeriesSolver(problem, time_budget)
+    assignment = solver.solve()
+
+    results = []
+    unassigned = []
+    for meeting_id in problem.meeting_ids:
+        option = solver.option(assignment, meeting_id)
+        if option is None:
+            unassigned.append(meeting_id)
+            continue
+        (date, block), _, attendance = option
+        fixed = meeting_id in problem.fixed
+        results.append({
+            'meeting_id': meeting_id,
+            'date': date.isoformat(),
+            'block': block,
+            'attendance': attendance,
+            'fixed': fixed
+        })
+        if not fixed and not dry_run:
+            db.session.add(FinalDate(meeting_id=meeting_id, date=date, block=block, confirmed_participants=attendance))
+
+    if not dry_run:
+        db.session.commit()
+
+    return {
+        'assignments': results,
+        'unassigned': unassigned,
+        'total_attendance': sum(result['attendance'] for result in results),
+        'iterations': solver.iterations,
+        'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+        'dry_run': dry_run
+    }
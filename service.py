@@ -1,4 +1,6 @@
-from models import db, Meeting, User, Role, guest_participation
+from flask import current_app
+from sqlalchemy import update
+from models import db, Meeting, MeetingChange, User, Role, guest_participation
 from utils import generate_meeting_hash, generate_random_color
 
 class MeetingService:
@@ -41,6 +43,35 @@ class MeetingService:
         meeting.confirmed_guests = db.session.query(guest_participation).filter_by(meeting_id=meeting.id, confirmed=True).count()
         db.session.commit()
 
+    @staticmethod
+    def bump_version(meeting_id):
+        """
+        Incrementa la versión de la reunión dentro de la transacción actual (no hace commit).
+        """
+        db.session.execute(
+            update(Meeting).where(Meeting.id == meeting_id).values(version=Meeting.version + 1)
+        )
+        return db.session.query(Meeting.version).filter_by(id=meeting_id).scalar()
+
+    @staticmethod
+    def record_change(meeting_id, kind, **fields):
+        """
+        Incrementa la versión de la reunión y agrega el cambio al log, dentro de la transacción actual.
+        Cada cierto número de cambios compacta el log para que no crezca sin límite.
+        """
+        seq = MeetingService.bump_version(meeting_id)
+        if seq is None:
+            return None
+
+        db.session.add(MeetingChange(meeting_id=meeting_id, seq=seq, kind=kind, **fields))
+
+        if seq % current_app.config['CHANGELOG_COMPACT_EVERY'] == 0:
+            MeetingChange.query.filter(
+                MeetingChange.meeting_id == meeting_id,
+                MeetingChange.seq <= seq - current_app.config['CHANGELOG_RETENTION']
+            ).delete(synchronize_session=False)
+        return seq
+
 class UserService:
     @staticmethod
     def create_user(name, email):
@@ -1,14 +1,26 @@
 #### Routes for Timeslot ####
 from flask import Blueprint, jsonify, abort, request
 from sqlalchemy.exc import SQLAlchemyError
-from models import db, Timeslot
+from models import db, Timeslot, Meeting
 from rank import calculate_rankings
+from idempotency import idempotent
+from service import MeetingService
 from datetime import datetime
 
 # Definición del Blueprint para las rutas de Timeslot
 timeslots_bp = Blueprint('timeslots', __name__)
 
+def abort_if_archived(meeting_id):
+    """
+    Rechaza cambios de disponibilidad en reuniones cuyos timeslots ya fueron archivados.
+    La fila de la reunión queda bloqueada hasta el commit, así que el archivado no puede
+    confirmarse entre esta verificación y la escritura.
+    """
+    if db.session.query(Meeting.archived_at).filter_by(id=meeting_id).with_for_update().scalar():
+        abort(409, 'Meeting is archived; its timeslots can no longer be changed')
+
 @timeslots_bp.route('/timeslots', methods=['POST'])
+@idempotent
 def create_timeslot():
     data = request.json
     if not data:
@@ -24,6 +36,8 @@ def create_timeslot():
         abort(400, 'Invalid block value. Must be 1, 2, or 3.')
 
     try:
+        abort_if_archived(data['meeting_id'])
+
         new_timeslot = Timeslot(
             meeting_id=data['meeting_id'],
             user_id=data['user_id'],
@@ -32,6 +46,11 @@ def create_timeslot():
             available=data.get('available', True)
         )
         db.session.add(new_timeslot)
+        db.session.flush()  # Flushea para obtener el ID del timeslot
+        MeetingService.record_change(
+            new_timeslot.meeting_id, 'timeslot', timeslot_id=new_timeslot.id, user_id=new_timeslot.user_id,
+            date=new_timeslot.date, block=new_timeslot.block, available=new_timeslot.available
+        )
         db.session.commit()
         return jsonify(new_timeslot.serialize()), 201
 
@@ -55,7 +74,13 @@ def update_timeslot():
     if not all([user_id, meeting_id, date_str, block is not None, available is not None]):
         abort(400, 'All fields (user_id, meeting_id, date, block, available) must be provided')
 
+    discount_booked = data.get('discount_booked', False)
+    if not isinstance(discount_booked, bool):
+        abort(400, 'discount_booked must be a boolean')
+
     try:
+        abort_if_archived(meeting_id)
+
         # Convertir la fecha a un objeto de tipo date
         date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
 
@@ -69,11 +94,16 @@ def update_timeslot():
             # Crear un nuevo timeslot si no existe
             timeslot = Timeslot(user_id=user_id, meeting_id=meeting_id, date=date_obj, block=block, available=available)
             db.session.add(timeslot)
+            db.session.flush()  # Flushea para obtener el ID del timeslot
 
+        MeetingService.record_change(
+            meeting_id, 'timeslot', timeslot_id=timeslot.id, user_id=timeslot.user_id,
+            date=timeslot.date, block=timeslot.block, available=timeslot.available
+        )
         db.session.commit()
 
         # Calcular los rankings después de la actualización
-        rankings = calculate_rankings(meeting_id)
+        rankings = calculate_rankings(meeting_id, discount_booked=discount_booked)
 
         return jsonify(rankings)
 
@@ -84,6 +114,15 @@ def update_timeslot():
 @timeslots_bp.route('/meetings/<int:meeting_id>/timeslots/<int:timeslot_id>', methods=['GET'])
 def get_timeslot_for_meeting(meeting_id, timeslot_id):
     try:
+        meeting = Meeting.query.get_or_404(meeting_id)
+        if meeting.archived_at:
+            # Reunión archivada: el timeslot se busca en el archivo
+            rows = meeting.archive.rows() if meeting.archive else []
+            timeslot = next((row for row in rows if row.id == timeslot_id), None)
+            if timeslot is None:
+                abort(404)
+            return jsonify(timeslot.serialize())
+
         # Obtener el timeslot por su ID y el ID de la reunión
         timeslot = Timeslot.query.filter_by(id=timeslot_id, meeting_id=meeting_id).first_or_404()
         return jsonify(timeslot.serialize())
@@ -98,6 +137,7 @@ def delete_timeslot(meeting_id, timeslot_id):
         
         # Si se encuentra, se procede a eliminarlo
         db.session.delete(timeslot)
+        MeetingService.record_change(meeting_id, 'timeslot_deleted', timeslot_id=timeslot_id)
         db.session.commit()
         
         return jsonify({'message': 'Timeslot deleted successfully'}), 200
@@ -1,15 +1,21 @@
 #### Routes for Users ####
-from flask import Blueprint, jsonify, abort
+from flask import Blueprint, jsonify, abort, request, Response
+from sqlalchemy import literal, union_all
 from sqlalchemy.exc import SQLAlchemyError
-from models import db, User
+from models import db, User, Timeslot, FinalDate, guest_participation
+from serializers import user_json
+from datetime import datetime
 
 users_bp = Blueprint('users', __name__)
 
 @users_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
     try:
-        user = User.query.get_or_404(user_id)
-        return jsonify(user.serialize())
+        # Serialización directa desde filas Core (ver serializers.py)
+        body = user_json(user_id)
+        if body is None:
+            abort(404)
+        return Response(body, status=200, mimetype='application/json')
     except SQLAlchemyError as e:
         abort(500, f'Error retrieving user: {str(e)}')
 
@@ -22,4 +28,75 @@ def delete_user(user_id):
         return jsonify({'message': 'User deleted successfully'}), 200
     except SQLAlchemyError as e:
         db.session.rollback()
-        abort(500, f'Error deleting user: {str(e)}')
\ No newline at end of file
+        abort(500, f'Error deleting user: {str(e)}')
+
+def parse_date_arg(name):
+    """Obtiene un parámetro de fecha (YYYY-MM-DD) de la query string, o None si no viene."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        abort(400, f'Invalid {name} date. Must be YYYY-MM-DD.')
+
+@users_bp.route('/users/<int:user_id>/busy', methods=['GET'])
+def get_user_busy(user_id):
+    date_from = parse_date_arg('from')
+    date_to = parse_date_arg('to')
+    if date_from and date_to and date_from > date_to:
+        abort(400, 'The from date must be before the to date')
+
+    try:
+        User.query.get_or_404(user_id)
+
+        # Disponibilidad comprometida del usuario (usa el índice user_id, date, block)
+        availability = db.select(
+            literal('availability').label('kind'), Timeslot.meeting_id, Timeslot.date, Timeslot.block
+        ).where(Timeslot.user_id == user_id, Timeslot.available.is_(True))
+
+        # Fechas finales de las reuniones en que participa el usuario
+        final_dates = db.select(
+            literal('final_date').label('kind'), FinalDate.meeting_id, FinalDate.date, FinalDate.block
+        ).join(
+            guest_participation, guest_participation.c.meeting_id == FinalDate.meeting_id
+        ).where(guest_participation.c.user_id == user_id)
+
+        if date_from:
+            availability = availability.where(Timeslot.date >= date_from)
+            final_dates = final_dates.where(FinalDate.date >= date_from)
+        if date_to:
+            availability = availability.where(Timeslot.date <= date_to)
+            final_dates = final_dates.where(FinalDate.date <= date_to)
+
+        query = union_all(availability, final_dates).subquery()
+        rows = db.session.execute(db.select(query).order_by(query.c.date, query.c.block)).all()
+
+        busy = {'availability': [], 'final_date': []}
+        for row in rows:
+            busy[row.kind].append({'meeting_id': row.meeting_id, 'date': row.date.isoformat(), 'block': row.block})
+
+        # Un choque es un bloque ocupado por la fecha final de una reunión en el que el usuario
+        # también está comprometido con otra reunión
+        conflicts = []
+        for final in busy['final_date']:
+            clashing = sorted({
+                entry['meeting_id'] for entry in busy['availability'] + busy['final_date']
+                if entry['meeting_id'] != final['meeting_id']
+                and entry['date'] == final['date']
+                and (final['block'] is None or entry['block'] is None or entry['block'] == final['block'])
+            })
+            if clashing:
+                conflicts.append({**final, 'conflicting_meeting_ids': clashing})
+
+        return jsonify({
+            'user_id': user_id,
+            'from': date_from.isoformat() if date_from else None,
+            'to': date_to.isoformat() if date_to else None,
+            'final_dates': busy['final_date'],
+            'availability': busy['availability'],
+            'conflicts': conflicts
+        }), 200
+
+    except SQLAlchemyError as e:
+        abort(500, f'Error retrieving busy slots: {str(e)}')
@@ -1,6 +1,7 @@
 import random
 import hashlib
 import time
+from flask import request
 
 
 def generate_random_color():
@@ -21,3 +22,18 @@ def generate_meeting_hash(title, creator_email):
     unique_string = f"{title}-{creator_email}-{time.time()}"
     return hashlib.sha256(unique_string.encode()).hexdigest()
 
+def build_invite_link(meeting_id, password_hash):
+    # Enlace de acceso a la reunión que se comparte con los invitados
+    return f"http://localhost:5000/meetings/{meeting_id}/access?hash={password_hash}"
+
+def get_request_meeting_id():
+    """Obtiene el meeting_id de la ruta, de la query string o del cuerpo JSON."""
+    meeting_id = (request.view_args or {}).get('meeting_id') or request.args.get('meeting_id')
+    if meeting_id is None and request.is_json:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            meeting_id = data.get('meeting_id')
+    try:
+        return int(meeting_id) if meeting_id is not None else None
+    except (TypeError, ValueError):
+        return None